@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import product
+from pathlib import Path
+
+RootPath = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RootPath))
+
+Scenarios = {
+    "import": "import source",
+    "search": (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from source import ArgumentParser, Dictionary, make_spec\n"
+        "dictionary = Dictionary(binary_path=Path(sys.argv[1]), vectorize=False)\n"
+        "dictionary.count(make_spec(regex='ka*', types=['rz']))\n"
+        "list(dictionary.search(make_spec(regex='*ść', min_letters=3), limit=10))"
+    ),
+}
+
+Forbidden = (
+    "mwparserfromhell",
+    "bz2",
+    "xml.etree.ElementTree",
+    "urllib.request",
+    "http.server",
+    "asyncio",
+    "multiprocessing",
+    "numpy",
+    "source.convert",
+    "source.fetch",
+    "source.parse",
+    "source.build",
+)
+
+
+def sample_store(path: Path) -> Path:
+    from source.store import Store
+
+    kinds = (["rzeczownik"], ["czasownik"], ["przymiotnik"], ["rzeczownik", "przymiotnik"])
+    words = sorted({"".join(letters) for letters in product("kaośćrz", repeat=5)})
+    Store.from_entries(
+        {"word": word, "pos": kinds[n % len(kinds)], "syllables": 1 + n % 4}
+        for n, word in enumerate(words)
+    ).save(path)
+    return path
+
+
+def measure(code: str, runs: int, store: Path) -> tuple[float, list[str]]:
+    probe = (
+        f"{code}\n"
+        "import json, sys\n"
+        f"print(json.dumps(sorted(set({list(Forbidden)!r}) & set(sys.modules))))"
+    )
+    times = []
+    loaded: list[str] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", probe, str(store)],
+            cwd=RootPath,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        times.append((time.perf_counter() - start) * 1000)
+        loaded = json.loads(result.stdout.splitlines()[-1])
+    return statistics.median(times), loaded
+
+
+def baseline(runs: int, store: Path) -> float:
+    return measure("pass", runs, store)[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup time of search-only processes")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="Runs per scenario")
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Fail if a scenario takes longer than this above bare interpreter startup",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = sample_store(Path(directory) / "dictionary.bin")
+        interpreter = baseline(args.runs, store)
+        print(f"interpreter: {interpreter:.1f}ms")
+        failed = False
+        for name, code in Scenarios.items():
+            elapsed, loaded = measure(code, args.runs, store)
+            overhead = elapsed - interpreter
+            print(f"{name}: {elapsed:.1f}ms (+{overhead:.1f}ms)")
+            if loaded:
+                print(f"  loaded eagerly: {', '.join(loaded)}")
+                failed = True
+            if args.max_ms is not None and overhead > args.max_ms:
+                print(f"  over budget of +{args.max_ms:.1f}ms")
+                failed = True
+    sys.exit(1 if failed else 0)
@@ -1,5 +1,5 @@
 import streamlit as st
-from source import Dictionary, WikitionaryReaderException, make_filters
+from source import Dictionary, WikitionaryReaderException, make_spec
 
 st.set_page_config(
     page_title="Polish Dictionary",
@@ -49,12 +49,14 @@ def render_filters():
 
     return type_map, l_min, l_max, s_min, s_max
 
-def perform_search(regex, type_map, l_min, l_max, s_min, s_max):
+PageSize = 500
+
+def build_filters(regex, type_map, l_min, l_max, s_min, s_max):
     selected_types = [k for k, v in type_map.items() if v] or None
     if not selected_types:
-        return []
-    
-    filters = make_filters(
+        return None
+
+    return make_spec(
         regex=regex,
         types=selected_types,
         min_letters=l_min,
@@ -62,17 +64,34 @@ def perform_search(regex, type_map, l_min, l_max, s_min, s_max):
         min_syllables=s_min,
         max_syllables=s_max,
     )
-    results = dictionary.search(filters)
-    return sorted({result["word"] for result in results})
 
 regex_filter = st.text_input("Regex", placeholder="^fumu.*")
 type_map, l_min, l_max, s_min, s_max = render_filters()
 
 if regex_filter:
     try:
-        words = perform_search(regex_filter, type_map, l_min, l_max, s_min, s_max)
-        st.success(f"Found: {len(words)}")
-        if words:
+        filters = build_filters(regex_filter, type_map, l_min, l_max, s_min, s_max)
+        total = dictionary.count(filters) if filters else 0
+        st.success(f"Found: {total}")
+        stats = dictionary.stats
+        if "entries" in stats:
+            st.caption(
+                f"Dictionary: {stats['entries']} words, "
+                f"loaded in {stats['load_time']:.2f}s, "
+                f"~{stats['memory'] / (1024 * 1024):.1f}MB in memory"
+            )
+        if total:
+            pages = (total + PageSize - 1) // PageSize
+            page = st.number_input("Page", 1, pages, 1) if pages > 1 else 1
+            words = [
+                result["word"]
+                for result in dictionary.search(
+                    filters, limit=PageSize, offset=(page - 1) * PageSize
+                )
+            ]
             st.text_area("Results", "\n".join(words), height=400)
+        if filters:
+            with st.expander("Query plan"):
+                st.code(dictionary.explain(filters))
     except WikitionaryReaderException as error:
-        st.error(str(error))
\ No newline at end of file
+        st.error(str(error))
@@ -1,32 +1,106 @@
 #!/usr/bin/env python3
-from source import ArgumentParser, Dictionary, WikitionaryReaderException, make_filters
+from source import ArgumentParser, Dictionary, WikitionaryReaderException, make_spec
+
+
+def search_spec(args, regex: str) -> dict:
+    return make_spec(
+        regex=regex,
+        types=args.types,
+        min_letters=args.min_letters,
+        max_letters=args.max_letters,
+        min_syllables=args.min_syllables,
+        max_syllables=args.max_syllables,
+    )
 
 
 if __name__ == "__main__":
     try:
         args = ArgumentParser().parse_args()
-        dictionary = Dictionary()
+        dictionary = Dictionary(
+            workers=getattr(args, "workers", 0), vectorize=args.command != "search"
+        )
 
         if args.command == "make":
             dictionary.make(
                 include_redirects=args.include_redirects,
                 progress_every=args.progress_every,
+                export_json=args.export_json,
+                jobs=args.jobs,
+                streaming=args.streaming,
+                keep_intermediate=args.keep_intermediate,
+                incremental=args.incremental,
+                changes=args.changes,
+                resume=args.resume,
             )
 
-        elif args.command == "search":
-            results = dictionary.search(
-                make_filters(
-                    regex=args.regex,
-                    types=args.types,
-                    min_letters=args.min_letters,
-                    max_letters=args.max_letters,
-                    min_syllables=args.min_syllables,
-                    max_syllables=args.max_syllables,
+        elif args.command == "search" and args.patterns_file:
+            patterns = [line.strip() for line in args.patterns_file if line.strip()]
+            specs = {pattern: search_spec(args, pattern) for pattern in patterns}
+            if args.server:
+                from source import SearchClient
+
+                answers = SearchClient(args.server).batch(
+                    [
+                        {"spec": spec, "count": args.count, "limit": args.limit, "offset": args.offset}
+                        for spec in specs.values()
+                    ]
                 )
-            )
-            for record in results:
-                print(record["word"])
-            print(f"Found {len(results)} matching words.")
+                results = {
+                    pattern: (answer["found"], answer.get("words", []))
+                    for pattern, answer in zip(specs, answers)
+                }
+            elif args.count:
+                results = {
+                    pattern: (found, [])
+                    for pattern, found in dictionary.search_many(specs, count=True).items()
+                }
+            else:
+                results = {
+                    pattern: (len(records), [record["word"] for record in records])
+                    for pattern, records in dictionary.search_many(
+                        specs, limit=args.limit, offset=args.offset
+                    ).items()
+                }
+            for pattern, (found, words) in results.items():
+                if args.count:
+                    print(f"{pattern}\t{found}")
+                else:
+                    for word in words:
+                        print(f"{pattern}\t{word}")
+
+        elif args.command == "search":
+            filters = search_spec(args, args.regex)
+            if args.server:
+                from source import SearchClient
+
+                client = SearchClient(args.server)
+                if args.explain:
+                    print(client.explain(filters))
+                if args.count:
+                    print(f"Found {client.count(filters)} matching words.")
+                else:
+                    result = client.search(filters, limit=args.limit, offset=args.offset)
+                    for word in result["words"]:
+                        print(word)
+                    print(f"Found {result['found']} matching words.")
+            else:
+                if args.explain:
+                    print(dictionary.explain(filters))
+                if args.count:
+                    print(f"Found {dictionary.count(filters)} matching words.")
+                else:
+                    found = 0
+                    for record in dictionary.search(
+                        filters, limit=args.limit, offset=args.offset
+                    ):
+                        print(record["word"])
+                        found += 1
+                    print(f"Found {found} matching words.")
+
+        elif args.command == "serve":
+            from source import SearchServer
+
+            SearchServer(dictionary, host=args.host, port=args.port)()
 
     except WikitionaryReaderException as e:
         print(f"Error: {e}")
@@ -1,25 +1,32 @@
-from .argumentparser import ArgumentParser
-from .dictionary import Dictionary
-from .exception import WikitionaryReaderException
-from .filter import (
-    Filters,
-    RegexFilter,
-    TypeFilter,
-    LetterCountFilter,
-    SyllablesFilter,
-    OrFilters,
-    make_filters,
-)
+from importlib import import_module
 
-__all__ = [
-    "ArgumentParser",
-    "Dictionary",
-    "WikitionaryReaderException",
-    "Filters",
-    "RegexFilter",
-    "TypeFilter",
-    "LetterCountFilter",
-    "SyllablesFilter",
-    "OrFilters",
-    "make_filters",
-]
+_exports = {
+    "ArgumentParser": ".argumentparser",
+    "Dictionary": ".dictionary",
+    "WikitionaryReaderException": ".exception",
+    "SearchClient": ".client",
+    "SearchServer": ".server",
+    "Filters": ".filter",
+    "RegexFilter": ".filter",
+    "TypeFilter": ".filter",
+    "LetterCountFilter": ".filter",
+    "SyllablesFilter": ".filter",
+    "OrFilters": ".filter",
+    "compile_filters": ".filter",
+    "make_filters": ".filter",
+    "make_spec": ".filter",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_exports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(__all__)
@@ -1,4 +1,6 @@
 import argparse
+from pathlib import Path
+from .constants import ServerHost, ServerPort
 from .exception import WikitionaryReaderException
 
 
@@ -28,16 +30,64 @@ class ArgumentParser:
             default=10000,
             help="Progress report interval",
         )
+        make_parser.add_argument(
+            "--export-json",
+            action=argparse.BooleanOptionalAction,
+            default=True,
+            help="Also write dictionary.json next to the binary dictionary",
+        )
+        make_parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=None,
+            help="Worker processes for converting and parsing dumps (0 runs in-process)",
+        )
+        make_parser.add_argument(
+            "--streaming",
+            action=argparse.BooleanOptionalAction,
+            default=True,
+            help="Stream pages from the dumps straight into the dictionary",
+        )
+        make_parser.add_argument(
+            "--keep-intermediate",
+            action="store_true",
+            help="Keep the converted and parsed JSON files in .tmp for debugging",
+        )
+        make_parser.add_argument(
+            "--incremental",
+            action=argparse.BooleanOptionalAction,
+            default=True,
+            help="Reuse parse results from the page manifest for unchanged pages",
+        )
+        make_parser.add_argument(
+            "--changes",
+            nargs="+",
+            type=Path,
+            default=None,
+            help="Apply Wikimedia adds-changes dumps to the manifest instead of fetching full dumps",
+        )
+        make_parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue an interrupted make from the checkpoints left in .tmp",
+        )
 
         search_parser = subparsers.add_parser(
             "search", help="Search in generated dictionary"
         )
-        search_parser.add_argument(
+        pattern_group = search_parser.add_mutually_exclusive_group(required=True)
+        pattern_group.add_argument(
             "-r",
             "--regex",
-            required=True,
             help="Regex pattern (e.g., '.*ąt$'). '*' acts as wildcard.",
         )
+        pattern_group.add_argument(
+            "-f",
+            "--patterns-file",
+            type=argparse.FileType("r", encoding="utf-8"),
+            help="Read one regex pattern per line from a file ('-' for stdin)",
+        )
         search_parser.add_argument(
             "-t",
             "--types",
@@ -74,6 +124,66 @@ class ArgumentParser:
             default=None,
             help="Maximum number of syllables",
         )
+        search_parser.add_argument(
+            "-l",
+            "--limit",
+            type=int,
+            default=None,
+            help="Maximum number of results to print",
+        )
+        search_parser.add_argument(
+            "-o",
+            "--offset",
+            type=int,
+            default=0,
+            help="Number of results to skip",
+        )
+        search_parser.add_argument(
+            "-c",
+            "--count",
+            action="store_true",
+            help="Only print the number of matching words",
+        )
+        search_parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=0,
+            help="Search with this many worker processes (0 disables)",
+        )
+        search_parser.add_argument(
+            "-e",
+            "--explain",
+            action="store_true",
+            help="Print the query plan before the results",
+        )
+        search_parser.add_argument(
+            "--server",
+            default=None,
+            help=f"Send the query to a running search server (e.g. http://{ServerHost}:{ServerPort})",
+        )
+
+        serve_parser = subparsers.add_parser(
+            "serve", help="Keep the dictionary loaded and answer searches over HTTP"
+        )
+        serve_parser.add_argument(
+            "--host",
+            default=ServerHost,
+            help="Address to listen on",
+        )
+        serve_parser.add_argument(
+            "--port",
+            type=int,
+            default=ServerPort,
+            help="Port to listen on",
+        )
+        serve_parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=0,
+            help="Search with this many worker processes (0 disables)",
+        )
 
     def parse_args(self):
         try:
@@ -0,0 +1,125 @@
+from .pattern import Node, UnsupportedPattern
+
+MaxExpansion = 64
+
+
+def _matches(label: tuple, char: str) -> bool:
+    kind = label[0]
+    if kind == "any":
+        return char != "\n"
+    if kind == "lit":
+        return char == label[1]
+    negated, items = label[1], label[2]
+    variants = (char, char.upper())
+    found = any(low <= variant <= high for variant in variants for low, high in items)
+    return found != negated
+
+
+class Automaton:
+    def __init__(self, node: Node):
+        self._edges: list[list[tuple[tuple, int]]] = []
+        self._epsilon: list[list[int]] = []
+        start = self._state()
+        self._final = self._compile(node, start)
+        self._states: list[frozenset] = []
+        self._ids: dict[frozenset, int] = {}
+        self._transitions: list[dict[str, int]] = []
+        self._accepting: list[bool] = []
+        self.dead = self._intern(frozenset())
+        self.start = self._intern(self._closure({start}))
+
+    def _state(self) -> int:
+        self._edges.append([])
+        self._epsilon.append([])
+        return len(self._edges) - 1
+
+    def _compile(self, node: Node, state: int) -> int:
+        if node.kind == "empty":
+            return state
+        if node.kind in ("lit", "any", "set"):
+            if node.kind == "lit":
+                label = ("lit", node.value.lower())
+            elif node.kind == "any":
+                label = ("any",)
+            else:
+                label = ("set", *node.value)
+            target = self._state()
+            self._edges[state].append((label, target))
+            return target
+        if node.kind == "cat":
+            for child in node.children:
+                state = self._compile(child, state)
+            return state
+        if node.kind == "alt":
+            final = self._state()
+            for child in node.children:
+                branch = self._state()
+                self._epsilon[state].append(branch)
+                self._epsilon[self._compile(child, branch)].append(final)
+            return final
+        if node.kind == "rep":
+            child = node.children[0]
+            copies = node.min + (1 if node.max is None else node.max - node.min)
+            if copies > MaxExpansion:
+                raise UnsupportedPattern(f"Repetition too large: {node.min}..{node.max}")
+            for _ in range(node.min):
+                state = self._compile(child, state)
+            if node.max is None:
+                loop = self._state()
+                self._epsilon[state].append(loop)
+                self._epsilon[self._compile(child, loop)].append(loop)
+                return loop
+            final = self._state()
+            for _ in range(node.max - node.min):
+                self._epsilon[state].append(final)
+                state = self._compile(child, state)
+            self._epsilon[state].append(final)
+            return final
+        raise UnsupportedPattern(node.kind)
+
+    def _closure(self, states: set[int]) -> frozenset:
+        stack = list(states)
+        seen = set(states)
+        while stack:
+            for target in self._epsilon[stack.pop()]:
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return frozenset(seen)
+
+    def _intern(self, states: frozenset) -> int:
+        state = self._ids.get(states)
+        if state is None:
+            state = len(self._states)
+            self._ids[states] = state
+            self._states.append(states)
+            self._transitions.append({})
+            self._accepting.append(self._final in states)
+        return state
+
+    def step(self, state: int, char: str) -> int:
+        target = self._transitions[state].get(char)
+        if target is None:
+            target = self._intern(
+                self._closure(
+                    {
+                        target
+                        for source in self._states[state]
+                        for label, target in self._edges[source]
+                        if _matches(label, char)
+                    }
+                )
+            )
+            self._transitions[state][char] = target
+        return target
+
+    def accepts(self, state: int) -> bool:
+        return self._accepting[state]
+
+    def fullmatch(self, word: str) -> bool:
+        state = self.start
+        for char in word:
+            state = self.step(state, char)
+            if state == self.dead:
+                return False
+        return self._accepting[state]
@@ -1,11 +1,14 @@
 import json
 from pathlib import Path
+from typing import Callable, Iterable
 
 from . import pathmanager
-from .constants import DictionaryPath
+from .checkpoint import Checkpoint
+from .constants import BinaryDictionaryPath, DictionaryPath
 from .exception import WikitionaryReaderException
 from .logger import Log
 from .parallelrun import ParallelRun
+from .store import Store
 
 
 def get_record(value: str) -> dict:
@@ -21,34 +24,75 @@ class BuildLang:
         self._progress_every = progress_every
         self._log = Log(name)
 
-    def __call__(self) -> dict:
+    def index(self, records: Iterable[dict]) -> dict:
         index = {}
         total_read = 0
-        with open(self._parsed_path, "r", encoding="utf-8") as f:
-            for line in f:
-                total_read += 1
-                record = get_record(line)
-                if not record:
-                    continue
-                word = (record.get("word") or record.get("title") or "").strip()
-                if not word:
-                    continue
-                key = word.lower()
-                pos = record.get("pos", [])
-                syllables = int(record.get("syllables", 0))
-                index[key] = {"word": word, "pos": pos, "syllables": syllables}
-                if self._progress_every and total_read % self._progress_every == 0:
-                    self._log.progress_pages(total_read, len(index), threshold=None)
+        for record in records:
+            total_read += 1
+            if not record:
+                continue
+            word = (record.get("word") or record.get("title") or "").strip()
+            if not word:
+                continue
+            key = word.lower()
+            pos = record.get("pos", [])
+            syllables = int(record.get("syllables", 0))
+            index[key] = {"word": word, "pos": pos, "syllables": syllables}
+            if self._progress_every and total_read % self._progress_every == 0:
+                self._log.progress_pages(total_read, len(index), threshold=None)
         self._log.complete_pages(total_read, len(index))
         return index
 
+    def __call__(self) -> dict:
+        with open(self._parsed_path, "r", encoding="utf-8") as f:
+            return self.index(get_record(line) for line in f)
+
+
+def save_dictionary(parts: dict[str, dict], export_json: bool) -> int:
+    final_index = dict(parts.get("eng", {}))
+    for k, v in parts.get("pl", {}).items():
+        if k not in final_index:
+            final_index[k] = v
+
+    sorted_index = dict(sorted(final_index.items()))
+    Store.from_entries(sorted_index.values()).save(BinaryDictionaryPath)
+    if export_json:
+        with open(DictionaryPath, "w", encoding="utf-8") as out_file:
+            json.dump(sorted_index, out_file, ensure_ascii=False, indent=0)
+    return len(sorted_index)
+
+
+def write_dictionary(
+    build: Callable[[], dict[str, dict]], export_json: bool, resume: bool, log: Log
+) -> Path:
+    checkpoint = Checkpoint("dictionary", resume)
+    if checkpoint.done and BinaryDictionaryPath.exists():
+        log.info(f"Reusing {BinaryDictionaryPath}")
+        return BinaryDictionaryPath
+
+    parts = build()
+    if not export_json:
+        pathmanager.remove_file(DictionaryPath)
+    written = save_dictionary(parts, export_json)
+    checkpoint.complete(entries=written)
+    log.complete_pages(sum(map(len, parts.values())), written)
+    return BinaryDictionaryPath
+
+
 class Build(ParallelRun[dict]):
-    def __init__(self, context: dict[str, Path], progress_every: int = 10000):
+    def __init__(
+        self,
+        context: dict[str, Path],
+        progress_every: int = 10000,
+        export_json: bool = True,
+        resume: bool = False,
+    ):
         parsed = context.get("parse", {})
         if "eng" not in parsed or "pl" not in parsed:
             raise WikitionaryReaderException("Build requires 'eng' and 'pl' sources.")
 
-        pathmanager.ensure_file(DictionaryPath, clean=True)
+        self._export_json = export_json
+        self._resume = resume
         self._log = Log("Build dictionary")
 
         tasks = {
@@ -58,18 +102,4 @@ class Build(ParallelRun[dict]):
         super().__init__(tasks)
 
     def __call__(self) -> Path:
-        parts = super().__call__()
-        eng = parts.get("eng", {})
-        pl = parts.get("pl", {})
-
-        final_index = dict(eng)
-        for k, v in pl.items():
-            if k not in final_index:
-                final_index[k] = v
-
-        sorted_index = dict(sorted(final_index.items()))
-        with open(DictionaryPath, "w", encoding="utf-8") as out_file:
-            json.dump(sorted_index, out_file, ensure_ascii=False, indent=0)
-
-        self._log.complete_pages(len(eng) + len(pl), len(sorted_index))
-        return DictionaryPath
\ No newline at end of file
+        return write_dictionary(super().__call__, self._export_json, self._resume, self._log)
\ No newline at end of file
@@ -0,0 +1,81 @@
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, array] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._refinements = 0
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "refinements": self._refinements,
+            }
+
+    def get(self, key: Hashable | None) -> array | None:
+        if key is None:
+            return None
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return rows
+
+    def narrowest(
+        self,
+        key: Hashable | None,
+        implies: Callable[[Hashable, Hashable], bool],
+        below: int,
+    ) -> array | None:
+        if key is None:
+            return None
+        with self._lock:
+            best = None
+            for cached_key, rows in self._entries.items():
+                size = len(rows) if best is None else len(best[1])
+                if len(rows) < min(size + 1, below) and implies(key, cached_key):
+                    best = (cached_key, rows)
+            if best is None:
+                return None
+            self._entries.move_to_end(best[0])
+            self._refinements += 1
+            return best[1]
+
+    def put(self, key: Hashable | None, rows: Iterable[int]):
+        if key is None:
+            return
+        rows = array("I", rows)
+        size = rows.itemsize * len(rows)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.itemsize * len(previous)
+            self._entries[key] = rows
+            self._bytes += size
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.itemsize * len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,39 @@
+import json
+import os
+from . import pathmanager
+from .constants import TmpDir
+
+CheckpointEvery = 10000
+
+
+class Checkpoint:
+    def __init__(self, name: str, resume: bool = False):
+        self._path = TmpDir / f"{name}.checkpoint.json"
+        self.state: dict = {}
+        if resume and self._path.exists():
+            try:
+                with open(self._path, "r", encoding="utf-8") as f:
+                    self.state = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.state = {}
+        else:
+            pathmanager.remove_file(self._path)
+        self._saved = self.state.get("pages", 0)
+
+    @property
+    def done(self) -> bool:
+        return bool(self.state.get("done"))
+
+    def due(self, pages: int) -> bool:
+        return pages - self._saved >= CheckpointEvery
+
+    def save(self, **state):
+        temporary = self._path.with_suffix(".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temporary, self._path)
+        self.state = state
+        self._saved = state.get("pages", 0)
+
+    def complete(self, **state):
+        self.save(done=True, **state)
@@ -0,0 +1,39 @@
+import json
+import urllib.error
+import urllib.request
+from typing import Any
+from .constants import ServerHost, ServerPort
+from .exception import WikitionaryReaderException
+
+
+class SearchClient:
+    def __init__(self, url: str = f"http://{ServerHost}:{ServerPort}"):
+        self._url = url.rstrip("/")
+
+    def _post(self, body: Any) -> Any:
+        request = urllib.request.Request(
+            f"{self._url}/search",
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            raise WikitionaryReaderException(json.load(e).get("error", str(e))) from e
+        except urllib.error.URLError as e:
+            raise WikitionaryReaderException(
+                f"Search server not reachable at {self._url}: {e.reason}"
+            ) from e
+
+    def search(self, spec: dict, limit: int | None = None, offset: int = 0) -> dict:
+        return self._post({"spec": spec, "limit": limit, "offset": offset})
+
+    def count(self, spec: dict) -> int:
+        return self._post({"spec": spec, "count": True})["found"]
+
+    def explain(self, spec: dict) -> str:
+        return self._post({"spec": spec, "explain": True})["plan"]
+
+    def batch(self, queries: list[dict]) -> list[dict]:
+        return self._post(queries)
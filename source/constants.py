@@ -8,3 +8,8 @@ RootPath = Path(__file__).resolve().parent.parent
 TmpDir = RootPath / Path("./.tmp")
 DataDir = RootPath / Path("./data")
 DictionaryPath = DataDir / Path("dictionary.json")
+BinaryDictionaryPath = DataDir / Path("dictionary.bin")
+ManifestDir = DataDir / Path("manifest")
+
+ServerHost = "127.0.0.1"
+ServerPort = 8765
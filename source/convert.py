@@ -1,127 +1,270 @@
 import bz2
+import hashlib
+import html
 import json
+import os
+import queue
 import re
-import xml.etree.ElementTree as ET
+import threading
+from collections import deque
+from functools import partial
+from itertools import islice
 from pathlib import Path
+from typing import Iterator
+from .checkpoint import Checkpoint
 from .constants import TmpDir
 from .exception import WikitionaryReaderException
 from .logger import Log
-from .parallelrun import ParallelRun
+from .parallelrun import ParallelRun, ordered_map
 
+ChunkSize = 1 << 20
+QueueSize = 16
+BatchSize = 256
 
-def get_first(page_element: ET.Element, localname: str) -> str:
-    for item in page_element.iter():
-        if item.tag.endswith(localname):
-            return item.text or ""
-    return ""
+_ns = re.compile(rb"<ns>([^<]*)</ns>")
+_title = re.compile(rb"<title>([^<]*)</title>")
+_text = re.compile(rb"<text\b[^>]*?(?:/>|>([^<]*)</text>)")
+_id = re.compile(rb"<id>([^<]*)</id>")
 
 
-def has_redirect(page_element: ET.Element) -> bool:
-    for item in page_element.iter():
-        if item.tag.endswith("redirect"):
-            return True
-    return False
+def _decompress(source_path: Path, chunks: queue.Queue, stop: threading.Event):
+    try:
+        with bz2.open(source_path, "rb") as input_file:
+            while not stop.is_set():
+                chunk = input_file.read(ChunkSize)
+                while not stop.is_set():
+                    try:
+                        chunks.put(chunk, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if not chunk:
+                    return
+    except Exception as e:
+        chunks.put(e)
 
 
-def iter_pages(xml_stream: bz2.BZ2File):
-    context = ET.iterparse(xml_stream, events=("end",))
-    for _, item in context:
-        if item.tag.endswith("page"):
-            yield item
-            item.clear()
+def iter_pages(source_path: Path) -> Iterator[bytes]:
+    chunks: queue.Queue = queue.Queue(maxsize=QueueSize)
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_decompress, args=(source_path, chunks, stop), daemon=True
+    )
+    reader.start()
+    buffer = b""
+    try:
+        while True:
+            chunk = chunks.get()
+            if isinstance(chunk, Exception):
+                raise WikitionaryReaderException(f"Failed to read dump: {chunk}") from chunk
+            if not chunk:
+                break
+            buffer += chunk
+            position = 0
+            while True:
+                start = buffer.find(b"<page>", position)
+                if start < 0:
+                    position = max(position, len(buffer) - len(b"<page>"))
+                    break
+                end = buffer.find(b"</page>", start)
+                if end < 0:
+                    position = start
+                    break
+                position = end + len(b"</page>")
+                yield buffer[start:position]
+            buffer = buffer[position:]
+    finally:
+        stop.set()
 
 
-class ConvertEng:
-    _pattern = re.compile(r"^==\s*Polish\s*==\s*$", re.IGNORECASE | re.MULTILINE)
+def _field(pattern: re.Pattern, page: bytes, position: int = 0) -> str:
+    found = pattern.search(page, position)
+    if found is None or found.group(1) is None:
+        return ""
+    return html.unescape(found.group(1).decode("utf-8").replace("\r\n", "\n"))
+
+
+def _last_revision(page: bytes) -> int:
+    return max(page.rfind(b"<revision>"), 0)
+
+
+def page_fields(page: bytes) -> tuple[str, bool, str, str]:
+    return (
+        _field(_ns, page),
+        b"<redirect" in page,
+        _field(_title, page),
+        _field(_text, page, _last_revision(page)),
+    )
+
+
+def page_key(page: bytes) -> tuple[str, str]:
+    revision = _last_revision(page)
+    page_id = _id.search(page, 0, revision or len(page))
+    revision_id = _id.search(page, revision) if revision else None
+    return (
+        page_id.group(1).decode("ascii") if page_id else _field(_title, page),
+        revision_id.group(1).decode("ascii") if revision_id else hashlib.sha1(page).hexdigest(),
+    )
+
+
+def select_page(pattern: re.Pattern, include_redirects: bool, page: bytes) -> dict | None:
+    ns, redirect, title, text = page_fields(page)
+    if ns != "0" or (redirect and not include_redirects) or not title or not text:
+        return None
+    if pattern.search(text):
+        return {"title": title, "text": text}
+    return None
+
+
+def select_pages(pattern: re.Pattern, include_redirects: bool, pages: list[bytes]) -> list[dict]:
+    records = []
+    for page in pages:
+        record = select_page(pattern, include_redirects, page)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+def encode_pages(pattern: re.Pattern, include_redirects: bool, pages: list[bytes]) -> list[str]:
+    return [
+        json.dumps(record, ensure_ascii=False) + "\n"
+        for record in select_pages(pattern, include_redirects, pages)
+    ]
+
 
-    def __init__(self, source_path: Path, include_redirects: bool, progress_every: int):
+class ConvertDump:
+    _pattern: re.Pattern
+    _output = ""
+
+    def __init__(
+        self,
+        source_path: Path,
+        include_redirects: bool,
+        progress_every: int,
+        name: str,
+        workers: int = 0,
+        resume: bool = False,
+    ):
         self._source_path = source_path
         self._include_redirects = include_redirects
         self._progress_every = progress_every
-        self._log = Log("Convert ENG")
-
-    def _page_to_json(self, page: ET.Element) -> dict:
-        if get_first(page, "ns") != "0":
-            return {}
-        if not self._include_redirects and has_redirect(page):
-            return {}
-        title = get_first(page, "title")
-        text = get_first(page, "text")
-        if not title or not text:
-            return {}
-        if not self._pattern.search(text):
-            return {}
-        return {"title": title, "text": text}
+        self._workers = workers
+        self._resume = resume
+        self._log = Log(name)
+
+    def select(self, pages: list[bytes]) -> list[dict]:
+        return select_pages(self._pattern, self._include_redirects, pages)
+
+    def select_page(self, page: bytes) -> dict | None:
+        return select_page(self._pattern, self._include_redirects, page)
+
+    def batches(
+        self, counter: list[int], source_path: Path | None = None, skip: int = 0
+    ) -> Iterator[list[bytes]]:
+        batch = []
+        for page in islice(iter_pages(source_path or self._source_path), skip, None):
+            counter[0] += 1
+            batch.append(page)
+            if len(batch) >= BatchSize:
+                yield batch
+                batch = []
+            if self._progress_every and counter[0] % self._progress_every == 0:
+                self._log.progress_pages(counter[0], counter[1], threshold=None)
+        if batch:
+            yield batch
+
+    def _sized(self, batches: Iterator[list[bytes]], sizes: deque) -> Iterator[list[bytes]]:
+        for batch in batches:
+            sizes.append(len(batch))
+            yield batch
+
+    def _encoded(self, counter: list[int], sizes: deque) -> Iterator[list[str]]:
+        return ordered_map(
+            partial(encode_pages, self._pattern, self._include_redirects),
+            self._sized(self.batches(counter, skip=counter[0]), sizes),
+            self._workers,
+        )
 
     def __call__(self) -> Path:
-        output_path = TmpDir / "eng.converted.json"
-        total = 0
-        written = 0
-        with bz2.open(self._source_path, "rb") as input_file, open(output_path, "w", encoding="utf-8") as out_file:
-            for page in iter_pages(input_file):
-                total += 1
-                result = self._page_to_json(page)
-                if result:
-                    out_file.write(json.dumps(result, ensure_ascii=False) + "\n")
-                    written += 1
-                if self._progress_every and total % self._progress_every == 0:
-                    self._log.progress_pages(total, written, threshold=None)
-        self._log.complete_pages(total, written)
+        output_path = TmpDir / self._output
+        checkpoint = Checkpoint(output_path.stem, self._resume)
+        if checkpoint.done and output_path.exists():
+            self._log.info(f"Reusing {output_path}")
+            return output_path
+
+        pages = checkpoint.state.get("pages", 0) if output_path.exists() else 0
+        counter = [pages, checkpoint.state.get("written", 0) if pages else 0]
+        if pages:
+            os.truncate(output_path, checkpoint.state["bytes"])
+            self._log.info(f"Resuming after {pages} pages")
+        sizes = deque()
+        with open(output_path, "a" if pages else "w", encoding="utf-8") as out_file:
+            for lines in self._encoded(counter, sizes):
+                out_file.writelines(lines)
+                pages += sizes.popleft()
+                counter[1] += len(lines)
+                if checkpoint.due(pages):
+                    out_file.flush()
+                    checkpoint.save(pages=pages, written=counter[1], bytes=out_file.tell())
+            out_file.flush()
+            checkpoint.complete(pages=pages, written=counter[1], bytes=out_file.tell())
+        self._log.complete_pages(*counter)
         return output_path
 
 
-class ConvertPl:
+class ConvertEng(ConvertDump):
+    _pattern = re.compile(r"^==\s*Polish\s*==\s*$", re.IGNORECASE | re.MULTILINE)
+    _output = "eng.converted.json"
+
+    def __init__(
+        self,
+        source_path: Path,
+        include_redirects: bool,
+        progress_every: int,
+        workers: int = 0,
+        resume: bool = False,
+    ):
+        super().__init__(source_path, include_redirects, progress_every, "Convert ENG", workers, resume)
+
+
+class ConvertPl(ConvertDump):
     _pattern = re.compile(
         r"^==\s*[^=\n]+?\s*\(\s*\{\{\s*język\s+polski\s*\}\}\s*\)\s*==\s*$",
         re.IGNORECASE | re.MULTILINE,
     )
+    _output = "pl.converted.json"
 
-    def __init__(self, source_path: Path, include_redirects: bool, progress_every: int):
-        self._source_path = source_path
-        self._include_redirects = include_redirects
-        self._progress_every = progress_every
-        self._log = Log("Convert PL")
-
-    def _page_to_json(self, page: ET.Element) -> dict:
-        if get_first(page, "ns") != "0":
-            return {}
-        if not self._include_redirects and has_redirect(page):
-            return {}
-        title = get_first(page, "title")
-        text = get_first(page, "text")
-        if not title or not text:
-            return {}
-        if not self._pattern.search(text):
-            return {}
-        return {"title": title, "text": text}
+    def __init__(
+        self,
+        source_path: Path,
+        include_redirects: bool,
+        progress_every: int,
+        workers: int = 0,
+        resume: bool = False,
+    ):
+        super().__init__(source_path, include_redirects, progress_every, "Convert PL", workers, resume)
 
-    def __call__(self) -> Path:
-        output_path = TmpDir / "pl.converted.json"
-        total = 0
-        written = 0
-        with bz2.open(self._source_path, "rb") as input_file, open(output_path, "w", encoding="utf-8") as out_file:
-            for page in iter_pages(input_file):
-                total += 1
-                result = self._page_to_json(page)
-                if result:
-                    out_file.write(json.dumps(result, ensure_ascii=False) + "\n")
-                    written += 1
-                if self._progress_every and total % self._progress_every == 0:
-                    self._log.progress_pages(total, written, threshold=None)
-        self._log.complete_pages(total, written)
-        return output_path
 
 class Convert(ParallelRun[Path]):
-    def __init__(self, context: dict[str, Path], include_redirects: bool, progress_every: int = 10000):
+    def __init__(
+        self,
+        context: dict[str, Path],
+        include_redirects: bool,
+        progress_every: int = 10000,
+        workers: int | None = None,
+        resume: bool = False,
+    ):
         sources = context.get("fetch", {})
         if "eng" not in sources or "pl" not in sources:
             raise WikitionaryReaderException("Convert requires 'eng' and 'pl' sources.")
 
+        if workers is None:
+            workers = (os.cpu_count() or 1) // 2
         tasks = {
-            "eng": ConvertEng(sources["eng"], include_redirects, progress_every),
-            "pl": ConvertPl(sources["pl"], include_redirects, progress_every),
+            "eng": ConvertEng(sources["eng"], include_redirects, progress_every, workers, resume),
+            "pl": ConvertPl(sources["pl"], include_redirects, progress_every, workers, resume),
         }
         super().__init__(tasks)
 
     def __call__(self) -> dict:
-        return {"convert": super().__call__()}
\ No newline at end of file
+        return {"convert": super().__call__()}
@@ -1,12 +1,15 @@
 import json
+import threading
+import time
 from contextlib import contextmanager
-from . import pathmanager
-from .convert import Convert
-from .fetch import Fetch
-from .filter import Filters
-from .parse import Parse
-from .build import Build
+from itertools import islice
+from pathlib import Path
+from typing import Any, AsyncIterator, Hashable, Iterator, Mapping, Sequence
+from .filter import Filters, RegexFilter, compile_filters, key_implies, match_many
+from .planner import Plan
+from .cache import QueryCache
 from .constants import (
+    BinaryDictionaryPath,
     DataDir,
     TmpDir,
     DictionaryPath,
@@ -15,59 +18,347 @@ from .constants import (
 )
 from .exception import WikitionaryReaderException
 from .record import Record
+from .store import Store
+
+ParallelThreshold = 10000
+AsyncChunk = 512
 
 
 @contextmanager
-def make_context():
-    try:
-        yield
-    except KeyboardInterrupt:
-        raise
-    finally:
+def make_context(keep_tmp: bool = False):
+    from . import pathmanager
+
+    yield
+    if not keep_tmp:
         pathmanager.remove_dir(TmpDir)
 
 
 class Dictionary:
+    def __init__(
+        self,
+        path: Path = DictionaryPath,
+        binary_path: Path = BinaryDictionaryPath,
+        workers: int = 0,
+        vectorize: bool = True,
+    ):
+        self._path = path
+        self._binary_path = binary_path
+        self._lock = threading.Lock()
+        self._store = Store.from_entries([])
+        self._stamp: tuple[Path, int, int] | None = None
+        self._stats: dict = {}
+        self._cache = QueryCache()
+        self._sharded = None
+        self._threads = None
+        self._threads_lock = threading.Lock()
+        self._vectorize = vectorize
+        if workers:
+            from .shard import ShardedSearch
+
+            self._sharded = ShardedSearch(workers)
+
+    @property
+    def stats(self) -> dict:
+        return {**self._stats, "cache": self._cache.stats}
+
+    def _source(self) -> Path:
+        for path in (self._binary_path, self._path):
+            if path.exists():
+                return path
+        raise WikitionaryReaderException(
+            f"Dictionary file not found at: {self._path}. Run 'make' first."
+        )
+
+    def _load(self) -> Store:
+        path = self._source()
+        stat = path.stat()
+        stamp = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp == self._stamp:
+                return self._store
+
+            start = time.perf_counter()
+            if path == self._binary_path:
+                self._store = Store.open(path)
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._store = Store.from_entries(data.values())
+
+            self._stamp = stamp
+            self._cache.clear()
+            self._stats = {
+                "source": path.name,
+                "entries": len(self._store),
+                "load_time": time.perf_counter() - start,
+                "memory": self._store.nbytes,
+                "loads": self._stats.get("loads", 0) + 1,
+            }
+            return self._store
+
+    def load(self) -> dict:
+        self._load()
+        return self.stats
+
     def make(
         self,
         include_redirects: bool = False,
         progress_every: int = 10000,
+        export_json: bool = True,
+        jobs: int | None = None,
+        streaming: bool = True,
+        keep_intermediate: bool = False,
+        incremental: bool = True,
+        changes: Sequence[Path] | None = None,
+        resume: bool = False,
     ):
-        pathmanager.ensure_dir(path=DataDir, clean=True)
-        pathmanager.ensure_dir(path=TmpDir, clean=True)
+        from . import pathmanager
+        from .build import Build
+        from .checkpoint import Checkpoint
+        from .convert import Convert
+        from .fetch import Fetch
+        from .parse import Parse
+        from .pipeline import Stream, group_changes
+
+        if changes and not streaming:
+            raise WikitionaryReaderException("Applying change dumps requires --streaming.")
+
+        pathmanager.ensure_dir(path=DataDir)
+        pathmanager.ensure_dir(path=TmpDir, clean=not resume)
+
+        settings = {
+            "include_redirects": include_redirects,
+            "streaming": streaming,
+            "changes": sorted(str(path) for path in changes or []),
+        }
+        checkpoint = Checkpoint("make", resume)
+        if checkpoint.state and checkpoint.state != settings:
+            raise WikitionaryReaderException(
+                "Cannot resume: the previous run used different options. Run 'make' without --resume."
+            )
+        checkpoint.save(**settings)
 
         context: dict = {}
         try:
-            with make_context():
-                context = Fetch(context={"eng": EngUrl, "pl": PlUrl})()
+            with make_context(keep_tmp=keep_intermediate):
+                if not changes:
+                    context = Fetch(context={"eng": EngUrl, "pl": PlUrl}, resume=resume)()
+                if streaming:
+                    Stream(
+                        include_redirects=include_redirects,
+                        progress_every=progress_every,
+                        export_json=export_json,
+                        workers=jobs,
+                        keep_intermediate=keep_intermediate,
+                        incremental=incremental,
+                        changes=group_changes(changes) if changes else None,
+                        resume=resume,
+                        context=context,
+                    )()
+                    return
                 context = Convert(
                     include_redirects=include_redirects,
                     progress_every=progress_every,
+                    workers=jobs,
+                    resume=resume,
+                    context=context,
+                )()
+                context = Parse(
+                    progress_every=progress_every, workers=jobs, resume=resume, context=context
+                )()
+                Build(
+                    progress_every=progress_every,
+                    export_json=export_json,
+                    resume=resume,
                     context=context,
                 )()
-                context = Parse(progress_every=progress_every, context=context)()
-                Build(progress_every=progress_every, context=context)()
         except KeyboardInterrupt:
             raise
 
-    def search(self, filters: Filters) -> list[Record]:
-        if not DictionaryPath.exists():
-            raise WikitionaryReaderException(
-                f"Dictionary file not found at: {DictionaryPath}. Run 'make' first."
-            )
+    def _plan(self, filters: Filters | dict, store: Store) -> Plan:
+        if isinstance(filters, dict):
+            filters = compile_filters(filters)
+        return Plan(filters, store, self._vectorize)
 
-        with open(DictionaryPath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+    def search(
+        self, filters: Filters | dict, limit: int | None = None, offset: int = 0
+    ) -> Iterator[Record]:
+        store = self._load()
+        plan = self._plan(filters, store)
+        key = plan.key
+        stop = None if limit is None else offset + limit
+        rows = self._cached(plan, key)
+        if rows is not None:
+            for row in rows[offset:stop]:
+                yield store.record(row)
+            return
 
-        results: list[Record] = []
+        if limit is not None:
+            for row in islice(plan.rows(), offset, stop):
+                yield store.record(row)
+            return
 
-        for _, entry in data.items():
-            record = Record(
-                word=entry["word"],
-                pos=entry.get("pos", []),
-                syllables=entry.get("syllables", {"text": "", "count": 0}),
-            )
-            if filters.apply(record):
-                results.append(record)
+        if self._parallel(plan, key):
+            rows = self._execute(plan, key)
+            self._cache.put(key, rows)
+            for row in rows[offset:]:
+                yield store.record(row)
+            return
+
+        rows = []
+        for row in plan.rows():
+            rows.append(row)
+            if len(rows) > offset:
+                yield store.record(row)
+        self._cache.put(key, rows)
+
+    def _parallel(self, plan: Plan, key: tuple | None) -> bool:
+        return (
+            self._sharded is not None
+            and key is not None
+            and self._stamp is not None
+            and self._stamp[0] == self._binary_path
+            and plan.scanned >= ParallelThreshold
+        )
+
+    def _execute(self, plan: Plan, key: tuple | None) -> list[int]:
+        if self._parallel(plan, key):
+            path, *stamp = self._stamp
+            return self._sharded.search(path, tuple(stamp), plan.spec, len(self._store))
+        return plan.execute()
+
+    def _executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        threads = self._threads
+        if threads is not None:
+            return threads
+        with self._threads_lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(thread_name_prefix="dictionary")
+            return self._threads
+
+    async def asearch_iter(
+        self,
+        filters: Filters | dict,
+        limit: int | None = None,
+        offset: int = 0,
+        chunk: int = AsyncChunk,
+    ) -> AsyncIterator[Record]:
+        import asyncio
+
+        records = self.search(filters, limit=limit, offset=offset)
+        pending = None
+        try:
+            while True:
+                pending = self._executor().submit(lambda: list(islice(records, chunk)))
+                batch = await asyncio.wrap_future(pending)
+                if not batch:
+                    return
+                for record in batch:
+                    yield record
+        finally:
+            if pending is None:
+                records.close()
+            else:
+                pending.add_done_callback(lambda _: records.close())
+
+    async def asearch(
+        self, filters: Filters | dict, limit: int | None = None, offset: int = 0
+    ) -> list[Record]:
+        return [record async for record in self.asearch_iter(filters, limit, offset)]
+
+    async def acount(self, filters: Filters | dict) -> int:
+        import asyncio
+
+        return await asyncio.wrap_future(self._executor().submit(self.count, filters))
+
+    def close(self):
+        if self._sharded is not None:
+            self._sharded.close()
+        with self._threads_lock:
+            threads, self._threads = self._threads, None
+        if threads is not None:
+            threads.shutdown(wait=False, cancel_futures=True)
+
+    def _cached(self, plan: Plan, key: tuple | None) -> Sequence[int] | None:
+        rows = self._cache.get(key)
+        if rows is None:
+            base = self._cache.narrowest(key, key_implies, below=plan.scanned)
+            if base is not None:
+                rows = plan.refine(base)
+                self._cache.put(key, rows)
+        return rows
+
+    def _rows(self, filters: Filters | dict) -> Sequence[int]:
+        plan = self._plan(filters, self._load())
+        key = plan.key
+        rows = self._cached(plan, key)
+        if rows is None:
+            rows = self._execute(plan, key)
+            self._cache.put(key, rows)
+        return rows
+
+    def count(self, filters: Filters | dict) -> int:
+        return len(self._rows(filters))
+
+    def search_many(
+        self,
+        queries: Mapping[Hashable, Filters | dict] | Sequence[Filters | dict],
+        limit: int | None = None,
+        offset: int = 0,
+        count: bool = False,
+    ) -> dict[Hashable, list[Record] | int]:
+        store = self._load()
+        items = queries.items() if isinstance(queries, Mapping) else enumerate(queries)
+        plans = {name: self._plan(filters, store) for name, filters in items}
+
+        found: dict[Any, Sequence[int]] = {}
+        pending: dict[Any, Plan] = {}
+        for plan in plans.values():
+            key = plan.key if plan.key is not None else id(plan)
+            if key in found or key in pending:
+                continue
+            rows = self._cached(plan, plan.key)
+            if rows is None:
+                pending[key] = plan
+            else:
+                found[key] = rows
+
+        match_many(
+            store,
+            (
+                f
+                for plan in pending.values()
+                if plan.scanned * 4 >= len(store)
+                for f in plan.filters
+                if isinstance(f, RegexFilter)
+            ),
+        )
+        for key, plan in pending.items():
+            found[key] = plan.execute()
+            self._cache.put(plan.key, found[key])
+
+        rows = {
+            name: found[plan.key if plan.key is not None else id(plan)]
+            for name, plan in plans.items()
+        }
+        if count:
+            return {name: len(matched) for name, matched in rows.items()}
+        stop = None if limit is None else offset + limit
+        return {
+            name: [store.record(row) for row in matched[offset:stop]]
+            for name, matched in rows.items()
+        }
+
+    def __contains__(self, word: str) -> bool:
+        return word.lower() in self._load().dawg()
+
+    def completions(self, prefix: str) -> Iterator[Record]:
+        store = self._load()
+        rows = store.order("prefix").rows
+        for _, rank in store.dawg().completions(prefix.lower()):
+            yield store.record(rows[rank])
 
-        return results
\ No newline at end of file
+    def explain(self, filters: Filters | dict) -> str:
+        return self._plan(filters, self._load()).explain()
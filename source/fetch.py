@@ -1,43 +1,73 @@
 import urllib.request
 from pathlib import Path
 from . import pathmanager
+from .checkpoint import Checkpoint
 from .constants import TmpDir, DataDir
 from .exception import WikitionaryReaderException
 from .logger import Log
 from .parallelrun import ParallelRun
 
+DownloadChunk = 1 << 20
+
 
 class FetchDump:
-    def __init__(self, url: str, name: str):
+    def __init__(self, url: str, name: str, resume: bool = False):
         self._url = url
+        self._resume = resume
         self._log = Log(name)
 
     def __call__(self) -> Path:
         filename = pathmanager.get_filename(self._url)
         target_path = TmpDir / filename
+        checkpoint = Checkpoint(filename, self._resume)
+        if checkpoint.done and target_path.exists():
+            self._log.info(f"Reusing downloaded {target_path}")
+            return target_path
+
+        offset = checkpoint.state.get("bytes", 0) if target_path.exists() else 0
+        validator = checkpoint.state.get("validator")
+        headers = {"Range": f"bytes={offset}-", "If-Range": validator} if offset and validator else {}
 
         try:
             self._log.info(f"Downloading: {self._url} to {target_path}")
+            with urllib.request.urlopen(urllib.request.Request(self._url, headers=headers)) as response:
+                if response.status == 206:
+                    self._log.info(f"Resuming download at {offset / (1024 * 1024):.2f}MB")
+                else:
+                    offset = 0
+                validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+                length = int(response.headers.get("Content-Length") or 0)
+                total = offset + length
 
-            def reporthook(blocknum: int, blocksize: int, totalsize: int):
-                if totalsize <= 0:
-                    return
-                downloaded = (blocknum * blocksize) / (1024 * 1024)
-                total = totalsize / (1024 * 1024)
-                self._log.progress_download(total=total, downloaded=downloaded, threshold=None)
-
-            urllib.request.urlretrieve(self._url, target_path, reporthook=reporthook)
+                with open(target_path, "r+b" if offset else "wb") as out_file:
+                    out_file.truncate(offset)
+                    out_file.seek(offset)
+                    while chunk := response.read(DownloadChunk):
+                        out_file.write(chunk)
+                        out_file.flush()
+                        offset += len(chunk)
+                        checkpoint.save(bytes=offset, validator=validator)
+                        if length:
+                            self._log.progress_download(
+                                total=total / (1024 * 1024),
+                                downloaded=offset / (1024 * 1024),
+                                threshold=None,
+                            )
 
-            self._log.complete_download(target_path.stat().st_size / (1024 * 1024))
+            checkpoint.complete(bytes=offset, validator=validator)
+            self._log.complete_download(offset / (1024 * 1024))
             return target_path
         except Exception as e:
             raise WikitionaryReaderException(f"Failed to download dump: {e}") from e
 
 class Fetch(ParallelRun[Path]):
-    def __init__(self, context: dict[str, str]):
+    def __init__(self, context: dict[str, str], resume: bool = False):
         pathmanager.ensure_dir(path=DataDir, clean=False)
-        tasks = {key: FetchDump(url=url, name=f"Fetch {key.upper()} Dump") for key, url in context.items()}
+        tasks = {
+            key: FetchDump(url=url, name=f"Fetch {key.upper()} Dump", resume=resume)
+            for key, url in context.items()
+        }
         super().__init__(tasks)
 
     def __call__(self) -> dict:
-        return {"fetch": super().__call__()}
\ No newline at end of file
+        return {"fetch": super().__call__()}
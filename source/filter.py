@@ -1,22 +1,94 @@
+import operator
 import re
 from abc import ABC, abstractmethod
-from typing import Any, Callable
+from functools import lru_cache, reduce
+from typing import Any, Callable, Iterable, Sequence
 from .exception import WikitionaryReaderException
+from .automaton import Automaton
+from .index import query_count, query_rows
+from .pattern import (
+    UnsupportedPattern,
+    leading_wildcard,
+    literal_affix,
+    min_length,
+    ngram_query,
+    parse,
+    prefix_form,
+)
 from .record import Record
+from .store import PosTypes, Store, pos_mask
 
 
 class Filter:
+    cost = 40
+    exact = False
+
     def __init__(self, condition: Callable[[Record], bool]):
         self._condition = condition
 
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
     def apply(self, item: Record) -> bool:
         return self._condition(item)
 
+    def select(self, store: Store, rows: Iterable[int]) -> list[int]:
+        return [row for row in rows if self._condition(store.record(row))]
+
+    def estimate(self, store: Store) -> int:
+        return len(store)
+
+    def selectivity(self, store: Store) -> float:
+        return self.estimate(store) / len(store) if len(store) else 0.0
+
+    def matches_all(self, store: Store) -> bool:
+        return self.exact and self.estimate(store) >= len(store)
+
+    def candidates(self, store: Store) -> Sequence[int] | None:
+        return None
+
+    def spec(self) -> dict | None:
+        return None
+
+    def key(self) -> tuple | None:
+        spec = self.spec()
+        return None if spec is None else spec_key(spec)
+
+    def mask(self, store: Store):
+        return None
+
 
 class Filters(ABC):
     def __init__(self, filters: list[Filter] = None):
         self._filters = filters if filters else []
 
+    def __iter__(self):
+        return iter(self._filters)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(map(repr, self._filters))})"
+
+    @property
+    def cost(self) -> int:
+        return sum(f.cost for f in self._filters)
+
+    @property
+    def exact(self) -> bool:
+        return all(f.exact for f in self._filters)
+
+    def selectivity(self, store: Store) -> float:
+        return self.estimate(store) / len(store) if len(store) else 0.0
+
+    def spec(self) -> dict | None:
+        specs = [f.spec() for f in self._filters]
+        if any(spec is None for spec in specs):
+            return None
+        return {self._kind: specs}
+
+    def key(self) -> tuple | None:
+        spec = self.spec()
+        return None if spec is None else spec_key(spec)
+
     def add(self, filter: Any):
         if isinstance(filter, Filter) or isinstance(filter, Filters):
             self._filters.append(filter)
@@ -27,85 +99,463 @@ class Filters(ABC):
     def apply(self, _: Record) -> bool:
         pass
 
+    @abstractmethod
+    def select(self, store: Store, rows: Iterable[int]) -> list[int]:
+        pass
+
+    @abstractmethod
+    def estimate(self, store: Store) -> int:
+        pass
+
+    @abstractmethod
+    def matches_all(self, store: Store) -> bool:
+        pass
+
+    @abstractmethod
+    def candidates(self, store: Store) -> Sequence[int] | None:
+        pass
+
 
 class AndFilters(Filters):
+    _kind = "and"
+
     def __init__(self, filters: list[Filter] = None):
         super().__init__(filters)
 
     def apply(self, item: Record) -> bool:
         return all(f.apply(item) for f in self._filters)
 
+    def select(self, store: Store, rows: Iterable[int]) -> list[int]:
+        rows = list(rows)
+        for f in self._filters:
+            rows = f.select(store, rows)
+        return rows
+
+    def estimate(self, store: Store) -> int:
+        return min((f.estimate(store) for f in self._filters), default=len(store))
+
+    def mask(self, store: Store):
+        masks = [f.mask(store) for f in self._filters]
+        if not masks or any(mask is None for mask in masks):
+            return None
+        return reduce(operator.and_, masks)
+
+    def matches_all(self, store: Store) -> bool:
+        return all(f.matches_all(store) for f in self._filters)
+
+    def candidates(self, store: Store) -> Sequence[int] | None:
+        estimates = [f.estimate(store) for f in self._filters]
+        for estimate, f in sorted(zip(estimates, self._filters), key=lambda item: item[0]):
+            if estimate >= len(store):
+                break
+            rows = f.candidates(store)
+            if rows is not None:
+                return rows
+        return None
+
 
 class OrFilters(Filters):
+    _kind = "or"
+
     def __init__(self, filters: list[Filter] = None):
         super().__init__(filters)
 
     def apply(self, item: Record) -> bool:
         return True if not self._filters else any(f.apply(item) for f in self._filters)
 
+    def select(self, store: Store, rows: Iterable[int]) -> list[int]:
+        rows = list(rows)
+        if not self._filters:
+            return rows
+        matched = set()
+        for f in self._filters:
+            matched.update(f.select(store, [row for row in rows if row not in matched]))
+        return [row for row in rows if row in matched]
+
+    def estimate(self, store: Store) -> int:
+        if not self._filters:
+            return len(store)
+        return min(sum(f.estimate(store) for f in self._filters), len(store))
+
+    def mask(self, store: Store):
+        masks = [f.mask(store) for f in self._filters]
+        if not masks or any(mask is None for mask in masks):
+            return None
+        return reduce(operator.or_, masks)
+
+    def matches_all(self, store: Store) -> bool:
+        return not self._filters or any(f.matches_all(store) for f in self._filters)
+
+    def candidates(self, store: Store) -> Sequence[int] | None:
+        if not self._filters:
+            return None
+        parts = [f.candidates(store) for f in self._filters]
+        if any(part is None for part in parts):
+            return None
+        if len(parts) == 1:
+            return parts[0]
+        return sorted(set().union(*parts))
+
 
 class RegexFilter(Filter):
+    cost = 30
+
     def __init__(self, pattern: str):
+        self._pattern = pattern
         safe_pattern = pattern.replace("*", ".*")
         try:
             compiled_pattern = re.compile(safe_pattern, re.IGNORECASE)
         except re.error as e:
             raise ValueError(f"Invalid regex pattern: {pattern}") from e
 
+        self._compiled_pattern = compiled_pattern
+        try:
+            tree = parse(safe_pattern)
+            self._prefix = literal_affix(tree)[0]
+            self._suffix = literal_affix(tree, suffix=True)[0]
+            self._ngrams = ngram_query(tree)
+        except UnsupportedPattern:
+            self._prefix = self._suffix = ""
+            self._ngrams = None
+            tree = None
+        self._automaton = None
+        self._matched: tuple[Store, set[int]] | None = None
+        if tree is not None and not leading_wildcard(tree):
+            try:
+                self._automaton = Automaton(tree)
+            except UnsupportedPattern:
+                pass
         super().__init__(
             lambda record: bool(compiled_pattern.fullmatch(record["word"]))
         )
 
+    def _lookup(self, store: Store) -> tuple[int, str, Any] | None:
+        lookups = [
+            (store.order(name).count(affix), name, affix)
+            for name, affix in (("prefix", self._prefix), ("suffix", self._suffix[::-1]))
+            if affix
+        ]
+        if self._ngrams is not None:
+            postings = store.index("ngrams")
+            lookups.append((query_count(postings, self._ngrams), "ngrams", self._ngrams))
+        return min(lookups, key=lambda lookup: lookup[0], default=None)
+
+    def select(self, store: Store, rows: Iterable[int]) -> list[int]:
+        rows = list(rows)
+        if (self._matched is not None and self._matched[0] is store) or (
+            self._automaton is not None and len(rows) * 4 >= len(store)
+        ):
+            matched = self._automaton_rows(store)
+            return [row for row in rows if row in matched]
+        fullmatch = self._compiled_pattern.fullmatch
+        word = store.word
+        return [row for row in rows if fullmatch(word(row))]
+
+    def _automaton_rows(self, store: Store) -> set[int]:
+        if self._matched is None or self._matched[0] is not store:
+            order = store.order("prefix").rows
+            ranks = store.dawg().intersect(self._automaton)
+            self._matched = (store, {order[rank] for rank in ranks})
+        return self._matched[1]
+
+    def __repr__(self) -> str:
+        return f"RegexFilter({self._pattern!r})"
+
+    def spec(self) -> dict | None:
+        return {"regex": self._pattern}
+
+    def estimate(self, store: Store) -> int:
+        lookup = self._lookup(store)
+        return len(store) if lookup is None else lookup[0]
+
+    def selectivity(self, store: Store) -> float:
+        if self._lookup(store) is None:
+            return 0.1
+        return super().selectivity(store)
+
+    def candidates(self, store: Store) -> Sequence[int] | None:
+        lookup = self._lookup(store)
+        if lookup is None:
+            return None
+        _, name, key = lookup
+        if name == "ngrams":
+            return query_rows(store.index(name), key)
+        return store.order(name).range(key)
+
 
 class TypeFilter(Filter):
+    cost = 1
+    exact = True
     _type_map = {"rz": "rzeczownik", "cz": "czasownik", "p": "przymiotnik"}
 
     def __init__(self, target_type: str):
         if target_type not in self._type_map:
             raise WikitionaryReaderException("Invalid POS type.")
         expected = self._type_map[target_type]
+        self._target_type = target_type
+        self._mask = pos_mask(expected)
+        self._bit = PosTypes.index(expected)
         super().__init__(lambda record: expected in record["pos"])
 
+    def select(self, store: Store, rows: Iterable[int]) -> list[int]:
+        pos = store.pos
+        mask = self._mask
+        return [row for row in rows if pos[row] & mask]
+
+    def __repr__(self) -> str:
+        return f"TypeFilter({self._target_type!r})"
+
+    def spec(self) -> dict | None:
+        return {"type": self._target_type}
+
+    def mask(self, store: Store):
+        pos = store.vector("pos")
+        return None if pos is None else (pos & self._mask) != 0
+
+    def estimate(self, store: Store) -> int:
+        return store.index("pos").count(self._bit)
+
+    def candidates(self, store: Store) -> Sequence[int] | None:
+        return store.index("pos").get(self._bit)
+
 
 class LetterCountFilter(Filter):
+    cost = 1
+    exact = True
+
     def __init__(self, min_letters: int = 0, max_letters: int = float("inf")):
+        self._range = (min_letters, max_letters)
         super().__init__(
             lambda record: min_letters <= len(record["word"]) <= max_letters
         )
 
+    def select(self, store: Store, rows: Iterable[int]) -> list[int]:
+        letters = store.letters
+        low, high = self._range
+        return [row for row in rows if low <= letters[row] <= high]
+
+    def __repr__(self) -> str:
+        return f"LetterCountFilter({self._range[0]}, {self._range[1]})"
+
+    def spec(self) -> dict | None:
+        low, high = self._range
+        return {"letters": [low, None if high == float("inf") else high]}
+
+    def mask(self, store: Store):
+        letters = store.vector("letters")
+        if letters is None:
+            return None
+        low, high = self._range
+        return (letters >= low) & (letters <= high)
+
+    def estimate(self, store: Store) -> int:
+        return store.index("letters").count_range(*self._range)
+
+    def candidates(self, store: Store) -> Sequence[int] | None:
+        return store.index("letters").range(*self._range)
+
 
 class SyllablesFilter(Filter):
+    cost = 1
+    exact = True
+
     def __init__(self, min_syllables: int = 0, max_syllables: int = float("inf")):
+        self._range = (min_syllables, max_syllables)
         super().__init__(
             lambda record: min_syllables <= int(record["syllables"]) <= max_syllables
         )
 
+    def select(self, store: Store, rows: Iterable[int]) -> list[int]:
+        syllables = store.syllables
+        low, high = self._range
+        return [row for row in rows if low <= syllables[row] <= high]
 
-def make_filters(
+    def __repr__(self) -> str:
+        return f"SyllablesFilter({self._range[0]}, {self._range[1]})"
+
+    def spec(self) -> dict | None:
+        low, high = self._range
+        return {"syllables": [low, None if high == float("inf") else high]}
+
+    def mask(self, store: Store):
+        syllables = store.vector("syllables")
+        if syllables is None:
+            return None
+        low, high = self._range
+        return (syllables >= low) & (syllables <= high)
+
+    def estimate(self, store: Store) -> int:
+        return store.index("syllables").count_range(*self._range)
+
+    def candidates(self, store: Store) -> Sequence[int] | None:
+        return store.index("syllables").range(*self._range)
+
+
+def match_many(store: Store, regexes: Iterable[RegexFilter]):
+    groups: dict[str, list[RegexFilter]] = {}
+    for regex in regexes:
+        if regex._matched is None or regex._matched[0] is not store:
+            groups.setdefault(regex._pattern, []).append(regex)
+    if not groups:
+        return
+
+    walked = [group for group in groups.values() if group[0]._automaton is not None]
+    scanned = [group for group in groups.values() if group[0]._automaton is None]
+    matched: list[tuple[list[RegexFilter], set[int]]] = []
+
+    order = store.order("prefix").rows
+    ranks = store.dawg().intersect_many([group[0]._automaton for group in walked])
+    for group, found in zip(walked, ranks):
+        matched.append((group, {order[rank] for rank in found}))
+
+    if scanned:
+        tests = [(group[0]._compiled_pattern.fullmatch, set()) for group in scanned]
+        for row in range(len(store)):
+            word = store.word(row)
+            for fullmatch, rows in tests:
+                if fullmatch(word):
+                    rows.add(row)
+        matched.extend(zip(scanned, (rows for _, rows in tests)))
+
+    for group, rows in matched:
+        for regex in group:
+            regex._matched = (store, rows)
+
+
+@lru_cache(maxsize=256)
+def _regex_implies(new: str, old: str) -> bool:
+    try:
+        old_form = prefix_form(parse(old.replace("*", ".*")))
+        if old_form is None:
+            return False
+        tree = parse(new.replace("*", ".*"))
+    except UnsupportedPattern:
+        return False
+    prefix, extra = old_form
+    return (
+        literal_affix(tree)[0].startswith(prefix)
+        and min_length(tree) >= len(prefix) + extra
+    )
+
+
+def key_implies(new: tuple, old: tuple) -> bool:
+    if new == old:
+        return True
+    kind = new[0]
+    if kind != old[0]:
+        return False
+    if kind in ("letters", "syllables"):
+        return old[1] <= new[1] and new[2] <= old[2]
+    if kind == "regex":
+        return _regex_implies(new[1], old[1])
+    if kind == "OrFilters":
+        return all(any(key_implies(n, o) for o in old[1]) for n in new[1])
+    if kind == "AndFilters":
+        return all(any(key_implies(n, o) for n in new[1]) for o in old[1])
+    return False
+
+
+def _is_range(value: Any) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) == 2
+        and type(value[0]) is int
+        and (value[1] is None or type(value[1]) is int)
+    )
+
+
+def _entry(spec: dict) -> tuple[str, Any]:
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise WikitionaryReaderException(f"Invalid filter spec: {spec!r}")
+    kind, value = next(iter(spec.items()))
+    if kind == "regex":
+        valid = isinstance(value, str)
+    elif kind == "type":
+        valid = isinstance(value, str) and value in TypeFilter._type_map
+    elif kind in ("letters", "syllables"):
+        valid = _is_range(value)
+    elif kind in ("and", "or"):
+        valid = isinstance(value, list)
+    else:
+        raise WikitionaryReaderException(f"Unknown filter kind: {kind!r}")
+    if not valid:
+        raise WikitionaryReaderException(f"Invalid filter spec: {spec!r}")
+    return kind, value
+
+
+def _bound(value: int | None) -> float:
+    return float("inf") if value is None else value
+
+
+def spec_key(spec: dict) -> tuple:
+    kind, value = _entry(spec)
+    if kind in ("regex", "type"):
+        return (kind, value)
+    if kind in ("letters", "syllables"):
+        return (kind, value[0], _bound(value[1]))
+    if kind == "and":
+        return ("AndFilters", frozenset(spec_key(item) for item in value))
+    if kind == "or":
+        return ("OrFilters", frozenset(spec_key(item) for item in value))
+    raise WikitionaryReaderException(f"Unknown filter kind: {kind}")
+
+
+def compile_filters(spec: dict) -> Any:
+    kind, value = _entry(spec)
+    if kind == "regex":
+        return RegexFilter(pattern=value)
+    if kind == "type":
+        return TypeFilter(target_type=value)
+    if kind == "letters":
+        return LetterCountFilter(min_letters=value[0], max_letters=_bound(value[1]))
+    if kind == "syllables":
+        return SyllablesFilter(min_syllables=value[0], max_syllables=_bound(value[1]))
+    if kind == "and":
+        return AndFilters([compile_filters(item) for item in value])
+    if kind == "or":
+        return OrFilters([compile_filters(item) for item in value])
+    raise WikitionaryReaderException(f"Unknown filter kind: {kind}")
+
+
+def make_spec(
     regex,
     types=None,
     min_letters=None,
     max_letters=None,
     min_syllables=None,
     max_syllables=None,
-) -> AndFilters:
-    filters = AndFilters()
-
+) -> dict:
     if not regex:
         raise WikitionaryReaderException("Regex pattern is required for filtering.")
-    filters.add(RegexFilter(pattern=regex))
+    specs = [{"regex": regex}]
 
     if types and isinstance(types, list) and len(types) > 0:
-        or_filters = OrFilters()
-        for t in set(types):
-            or_filters.add(TypeFilter(target_type=t))
-        filters.add(or_filters)
+        specs.append({"or": [{"type": t} for t in sorted(set(types))]})
 
     l_letters = min_letters if min_letters is not None else 0
     r_letters = max_letters if max_letters is not None else 100
-    filters.add(LetterCountFilter(min_letters=l_letters, max_letters=r_letters))
+    specs.append({"letters": [l_letters, r_letters]})
     l_syllables = min_syllables if min_syllables is not None else 0
-    r_syllables = max_syllables if max_syllables is not None else float("inf")
-    filters.add(SyllablesFilter(min_syllables=l_syllables, max_syllables=r_syllables))
+    specs.append({"syllables": [l_syllables, max_syllables]})
+
+    return {"and": specs}
+
 
-    return filters
+def make_filters(
+    regex,
+    types=None,
+    min_letters=None,
+    max_letters=None,
+    min_syllables=None,
+    max_syllables=None,
+) -> AndFilters:
+    return compile_filters(
+        make_spec(
+            regex=regex,
+            types=types,
+            min_letters=min_letters,
+            max_letters=max_letters,
+            min_syllables=min_syllables,
+            max_syllables=max_syllables,
+        )
+    )
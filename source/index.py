@@ -0,0 +1,133 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from typing import Callable, Iterable, Sequence
+
+
+def ngram_key(gram: str) -> int:
+    gram = gram.ljust(3, "\x00")
+    return (ord(gram[0]) << 42) | (ord(gram[1]) << 21) | ord(gram[2])
+
+
+class Postings:
+    def __init__(self, keys, starts, rows):
+        self.keys = keys
+        self.starts = starts
+        self.rows = rows
+        self._slots = {key: slot for slot, key in enumerate(keys)}
+
+    @classmethod
+    def from_groups(cls, groups: dict[int, list[int]], typecode: str = "H") -> "Postings":
+        keys = array(typecode)
+        starts = array("I", [0])
+        rows = array("I")
+        for key in sorted(groups):
+            keys.append(key)
+            rows.extend(groups[key])
+            starts.append(len(rows))
+        return cls(keys, starts, rows)
+
+    @classmethod
+    def from_values(cls, values: Iterable[int]) -> "Postings":
+        groups: dict[int, list[int]] = {}
+        for row, value in enumerate(values):
+            groups.setdefault(value, []).append(row)
+        return cls.from_groups(groups)
+
+    @classmethod
+    def from_masks(cls, masks: Iterable[int]) -> "Postings":
+        groups: dict[int, list[int]] = {}
+        for row, mask in enumerate(masks):
+            bit = 0
+            while mask:
+                if mask & 1:
+                    groups.setdefault(bit, []).append(row)
+                mask >>= 1
+                bit += 1
+        return cls.from_groups(groups)
+
+    @classmethod
+    def from_ngrams(cls, words: Iterable[str]) -> "Postings":
+        groups: dict[int, list[int]] = {}
+        for row, word in enumerate(words):
+            grams = {word[index:index + 3] for index in range(len(word) - 2)}
+            grams.update(word[index:index + 2] for index in range(len(word) - 1))
+            for gram in grams:
+                groups.setdefault(ngram_key(gram), []).append(row)
+        return cls.from_groups(groups, typecode="Q")
+
+    def get(self, key: int) -> Sequence[int]:
+        slot = self._slots.get(key)
+        if slot is None:
+            return ()
+        return self.rows[self.starts[slot]:self.starts[slot + 1]]
+
+    def count(self, key: int) -> int:
+        slot = self._slots.get(key)
+        if slot is None:
+            return 0
+        return self.starts[slot + 1] - self.starts[slot]
+
+    def count_range(self, low: float, high: float) -> int:
+        return sum(self.count(key) for key in self.keys if low <= key <= high)
+
+    def range(self, low: float, high: float) -> Sequence[int]:
+        parts = [self.get(key) for key in self.keys if low <= key <= high]
+        if len(parts) == 1:
+            return parts[0]
+        return sorted(chain.from_iterable(parts))
+
+
+class SortedKeys:
+    def __init__(self, rows, key: Callable[[int], str]):
+        self.rows = rows
+        self._key = key
+
+    @classmethod
+    def from_key(cls, count: int, key: Callable[[int], str]) -> "SortedKeys":
+        return cls(array("I", sorted(range(count), key=key)), key)
+
+    def _bounds(self, prefix: str) -> tuple[int, int]:
+        size = len(prefix)
+        key = lambda row: self._key(row)[:size]
+        low = bisect_left(self.rows, prefix, key=key)
+        return low, self.skip(prefix, low)
+
+    def count(self, prefix: str) -> int:
+        low, high = self._bounds(prefix)
+        return high - low
+
+    def skip(self, prefix: str, low: int = 0) -> int:
+        size = len(prefix)
+        return bisect_right(self.rows, prefix, lo=low, key=lambda row: self._key(row)[:size])
+
+    def range(self, prefix: str) -> list[int]:
+        low, high = self._bounds(prefix)
+        return sorted(self.rows[low:high])
+
+
+def query_count(postings: Postings, query: tuple) -> int:
+    kind, value = query
+    if kind == "tri":
+        return postings.count(ngram_key(value))
+    if kind == "and":
+        return min(query_count(postings, item) for item in value)
+    return sum(query_count(postings, item) for item in value)
+
+
+def query_rows(postings: Postings, query: tuple) -> list[int]:
+    kind, value = query
+    if kind == "tri":
+        return list(postings.get(ngram_key(value)))
+    if kind == "or":
+        return sorted(set().union(*(query_rows(postings, item) for item in value)))
+    items = sorted(value, key=lambda item: query_count(postings, item))
+    rows = set(query_rows(postings, items[0]))
+    for item in items[1:]:
+        if not rows:
+            break
+        if item[0] == "tri":
+            rows.intersection_update(postings.get(ngram_key(item[1])))
+        else:
+            rows.intersection_update(query_rows(postings, item))
+    return sorted(rows)
@@ -0,0 +1,47 @@
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+from . import pathmanager
+from .build import get_record
+
+ManifestVersion = 1
+
+
+def encode_entry(page_id: str, entry: tuple[str, list[dict]]) -> str:
+    revision, records = entry
+    return json.dumps({"id": page_id, "revision": revision, "records": records}, ensure_ascii=False) + "\n"
+
+
+def decode_entries(lines: Iterable[str]) -> dict[str, tuple[str, list[dict]]]:
+    entries = {}
+    for line in lines:
+        record = get_record(line)
+        if record:
+            entries[record["id"]] = (record["revision"], record["records"])
+    return entries
+
+
+class Manifest:
+    def __init__(self, path: Path, settings: dict):
+        self._path = path
+        self._header = {"version": ManifestVersion, **settings}
+
+    def load(self) -> dict[str, tuple[str, list[dict]]] | None:
+        if not self._path.exists():
+            return None
+        with open(self._path, "r", encoding="utf-8") as f:
+            if get_record(f.readline()) != self._header:
+                return None
+            return decode_entries(f)
+
+    def save(self, entries: dict[str, tuple[str, list[dict]]]):
+        pathmanager.ensure_dir(self._path.parent)
+        temporary = self._path.with_suffix(".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._header) + "\n")
+            f.writelines(encode_entry(page_id, entry) for page_id, entry in entries.items())
+        os.replace(temporary, self._path)
+
+    def remove(self):
+        pathmanager.remove_file(self._path)
@@ -1,7 +1,26 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, Generic, TypeVar
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Generic, Iterable, Iterator, TypeVar
 
 T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(
+    function: Callable[[T], R], items: Iterable[T], workers: int, window: int = 4
+) -> Iterator[R]:
+    if not workers:
+        for item in items:
+            yield function(item)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= workers * window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 class ParallelRun(Generic[T]):
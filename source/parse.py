@@ -1,11 +1,19 @@
 import json
+import os
 import re
 import mwparserfromhell
+from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator
+from source.checkpoint import Checkpoint
 from source.constants import TmpDir
 from source.exception import WikitionaryReaderException
 from source.logger import Log
-from source.parallelrun import ParallelRun
+from source.parallelrun import ParallelRun, ordered_map
+
+ChunkSize = 200
 
 
 def get_record(value: str) -> dict:
@@ -35,11 +43,127 @@ def count_syllables_heuristic(word: str) -> int:
     return max(len(re.findall(rf"[{vowels}]+", w)), 1)
 
 
-class ParsePl:
-    def __init__(self, converted_path: Path, progress_every: int = 10000):
+class ParseDump(ABC):
+    _output = ""
+
+    def __init__(
+        self,
+        converted_path: Path,
+        progress_every: int,
+        name: str,
+        workers: int = 0,
+        resume: bool = False,
+    ):
         self._converted_path = converted_path
         self._progress_every = progress_every
-        self._log = Log("Parse PL")
+        self._workers = workers
+        self._resume = resume
+        self._log = Log(name)
+
+    @abstractmethod
+    def _process_record(self, _: dict) -> dict:
+        pass
+
+    def process(self, records: Iterable[dict]) -> list[dict]:
+        processed_records = []
+        for record in records:
+            if not record:
+                continue
+            if has_multiword_title(record):
+                continue
+
+            processed = self._process_record(record)
+            if processed:
+                processed_records.append(processed)
+        return processed_records
+
+    def _process_lines(self, lines: list[str]) -> list[str]:
+        return [
+            json.dumps(processed, ensure_ascii=False) + "\n"
+            for processed in self.process(get_record(line) for line in lines)
+        ]
+
+    def _chunks(self, input_file, sizes: deque) -> Iterator[list[str]]:
+        while chunk := list(islice(input_file, ChunkSize)):
+            sizes.append(len(chunk))
+            yield chunk
+
+    def __call__(self) -> Path:
+        output_path = TmpDir / self._output
+        checkpoint = Checkpoint(output_path.stem, self._resume)
+        if checkpoint.done and output_path.exists():
+            self._log.info(f"Reusing {output_path}")
+            return output_path
+
+        skip = checkpoint.state.get("pages", 0) if output_path.exists() else 0
+        counter = [skip, checkpoint.state.get("written", 0) if skip else 0]
+        if skip:
+            os.truncate(output_path, checkpoint.state["bytes"])
+            self._log.info(f"Resuming after {skip} records")
+        sizes = deque()
+        reported = 0
+
+        with open(self._converted_path, "r", encoding="utf-8") as input_file, open(
+            output_path, "a" if skip else "w", encoding="utf-8"
+        ) as out_file:
+            deque(islice(input_file, skip), maxlen=0)
+            for lines in ordered_map(
+                self._process_lines, self._chunks(input_file, sizes), self._workers
+            ):
+                out_file.writelines(lines)
+                counter[0] += sizes.popleft()
+                counter[1] += len(lines)
+
+                if self._progress_every and counter[0] // self._progress_every > reported:
+                    reported = counter[0] // self._progress_every
+                    self._log.progress_pages(*counter, threshold=None)
+                if checkpoint.due(counter[0]):
+                    out_file.flush()
+                    checkpoint.save(pages=counter[0], written=counter[1], bytes=out_file.tell())
+            out_file.flush()
+            checkpoint.complete(pages=counter[0], written=counter[1], bytes=out_file.tell())
+
+        self._log.complete_pages(*counter)
+        return output_path
+
+
+class ParsePl(ParseDump):
+    _polish_header = re.compile(
+        r"^==\s*[^=\n]+?\s*\(\s*\{\{\s*język\s+polski\s*\}\}\s*\)\s*==\s*$",
+        re.IGNORECASE | re.MULTILINE,
+    )
+    _language_header = re.compile(r"^==[^=\n].*==\s*$", re.MULTILINE)
+    _template_start = re.compile(r"\{\{\s*odmiana-")
+    _braces = re.compile(r"\{\{|\}\}")
+    _meanings_heading = re.compile(r"^=[^\n]*znaczenia", re.IGNORECASE | re.MULTILINE)
+    _output = "pl.parsed.json"
+
+    def __init__(
+        self,
+        converted_path: Path,
+        progress_every: int = 10000,
+        workers: int = 0,
+        resume: bool = False,
+    ):
+        super().__init__(converted_path, progress_every, "Parse PL", workers, resume)
+
+    def _polish_section(self, text: str) -> str:
+        header = self._polish_header.search(text)
+        if not header:
+            return text
+        following = self._language_header.search(text, header.end())
+        return text[header.start() : following.start() if following else len(text)]
+
+    def _template_span(self, text: str) -> str | None:
+        start = self._template_start.search(text)
+        if not start:
+            return None
+        depth = 0
+        for brace in self._braces.finditer(text, start.start()):
+            depth += 1 if brace.group() == "{{" else -1
+            if depth == 0:
+                return text[start.start() : brace.end()]
+        return text[start.start() :]
 
     def _clean_wikicode_value(self, value_obj) -> list[str]:
         raw_value = str(value_obj)
@@ -99,15 +223,26 @@ class ParsePl:
         if not isinstance(raw_text, str) or not raw_text:
             return {}
 
+        section = self._polish_section(raw_text)
+        span = self._template_span(section)
+        has_meanings = self._meanings_heading.search(section) is not None
+        if span is None and not has_meanings:
+            return {}
+
         try:
-            wikicode = mwparserfromhell.parse(raw_text)
+            wikicode = mwparserfromhell.parse(section if span is None else span)
         except Exception:
             return {}
 
         inflection, pos_from_template = self._extract_inflection_and_pos(wikicode)
 
         final_pos = pos_from_template
-        if final_pos == "nieznany":
+        if final_pos == "nieznany" and has_meanings:
+            if span is not None:
+                try:
+                    wikicode = mwparserfromhell.parse(section)
+                except Exception:
+                    return {}
             sections = wikicode.get_sections(matches="znaczenia")
             if sections:
                 txt = str(sections[0])
@@ -127,41 +262,18 @@ class ParsePl:
             "inflection": inflection,
         }
 
-    def __call__(self) -> Path:
-        output_path = TmpDir / "pl.parsed.json"
-        total = 0
-        written = 0
-
-        with open(self._converted_path, "r", encoding="utf-8") as input_file, open(
-            output_path, "w", encoding="utf-8"
-        ) as out_file:
-            for line in input_file:
-                total += 1
-                record = get_record(line)
-                if not record:
-                    continue
-                if has_multiword_title(record):
-                    continue
-
-                processed = self._process_record(record)
-                if not processed:
-                    continue
-
-                out_file.write(json.dumps(processed, ensure_ascii=False) + "\n")
-                written += 1
-
-                if self._progress_every and total % self._progress_every == 0:
-                    self._log.progress_pages(total, written, threshold=None)
 
-        self._log.complete_pages(total, written)
-        return output_path
+class ParseEng(ParseDump):
+    _output = "eng.parsed.json"
 
-
-class ParseEng:
-    def __init__(self, converted_path: Path, progress_every: int = 10000):
-        self._converted_path = converted_path
-        self._progress_every = progress_every
-        self._log = Log("Parse ENG")
+    def __init__(
+        self,
+        converted_path: Path,
+        progress_every: int = 10000,
+        workers: int = 0,
+        resume: bool = False,
+    ):
+        super().__init__(converted_path, progress_every, "Parse ENG", workers, resume)
 
     def _extract_polish_section(self, text: str) -> str:
         m = re.search(r"(?im)^==\s*Polish\s*==\s*$", text)
@@ -209,45 +321,24 @@ class ParseEng:
         syllables = count_syllables_heuristic(title)
         return {"word": title, "pos": pos, "syllables": syllables}
 
-    def __call__(self) -> Path:
-        output_path = TmpDir / "eng.parsed.json"
-        total = 0
-        written = 0
-
-        with open(self._converted_path, "r", encoding="utf-8") as input_file, open(
-            output_path, "w", encoding="utf-8"
-        ) as out_file:
-            for line in input_file:
-                total += 1
-                record = get_record(line)
-                if not record:
-                    continue
-                if has_multiword_title(record):
-                    continue
-
-                processed = self._process_record(record)
-                if not processed:
-                    continue
-
-                out_file.write(json.dumps(processed, ensure_ascii=False) + "\n")
-                written += 1
-
-                if self._progress_every and total % self._progress_every == 0:
-                    self._log.progress_pages(total, written, threshold=None)
-
-        self._log.complete_pages(total, written)
-        return output_path
-
 
 class Parse(ParallelRun[Path]):
-    def __init__(self, context: dict[str, Path], progress_every: int = 10000):
+    def __init__(
+        self,
+        context: dict[str, Path],
+        progress_every: int = 10000,
+        workers: int | None = None,
+        resume: bool = False,
+    ):
         converted = context.get("convert", {})
         if "eng" not in converted or "pl" not in converted:
             raise WikitionaryReaderException("Parse requires 'eng' and 'pl' sources.")
 
+        if workers is None:
+            workers = max((os.cpu_count() or 1) - 1, 0)
         tasks = {
-            "pl": ParsePl(converted["pl"], progress_every),
-            "eng": ParseEng(converted["eng"], progress_every),
+            "pl": ParsePl(converted["pl"], progress_every, workers, resume),
+            "eng": ParseEng(converted["eng"], progress_every, resume=resume),
         }
         super().__init__(tasks)
 
@@ -0,0 +1,289 @@
+from typing import NamedTuple
+
+
+class UnsupportedPattern(Exception):
+    pass
+
+
+class Node(NamedTuple):
+    kind: str
+    value: object = None
+    children: tuple = ()
+    min: int = 1
+    max: int | None = 1
+
+
+Empty = Node("empty")
+Any = Node("any")
+
+_special = set(".[](){}*+?|\\^$")
+_escapes = {"n": "\n", "t": "\t"}
+
+
+class _Parser:
+    def __init__(self, pattern: str):
+        self._pattern = pattern
+        self._position = 0
+
+    def parse(self) -> Node:
+        node = self._alternation(top=True)
+        if self._position != len(self._pattern):
+            raise UnsupportedPattern(self._pattern)
+        return node
+
+    def _peek(self) -> str:
+        return self._pattern[self._position] if self._position < len(self._pattern) else ""
+
+    def _next(self) -> str:
+        char = self._peek()
+        self._position += 1
+        return char
+
+    def _alternation(self, top: bool) -> Node:
+        branches = [self._concatenation(top)]
+        while self._peek() == "|":
+            self._next()
+            branches.append(self._concatenation(top))
+        return branches[0] if len(branches) == 1 else Node("alt", children=tuple(branches))
+
+    def _concatenation(self, top: bool) -> Node:
+        items = []
+        if top and self._peek() == "^":
+            self._next()
+        while self._peek() and self._peek() not in "|)":
+            if top and self._peek() == "$":
+                self._next()
+                if self._peek() and self._peek() != "|":
+                    raise UnsupportedPattern(self._pattern)
+                break
+            items.append(self._repetition())
+        if not items:
+            return Empty
+        return items[0] if len(items) == 1 else Node("cat", children=tuple(items))
+
+    def _repetition(self) -> Node:
+        node = self._atom()
+        while self._peek() in ("*", "+", "?", "{"):
+            char = self._peek()
+            if char == "{":
+                bounds = self._bounds()
+                if bounds is None:
+                    break
+                low, high = bounds
+            else:
+                self._next()
+                low, high = {"*": (0, None), "+": (1, None), "?": (0, 1)}[char]
+            if self._peek() in ("?", "+"):
+                raise UnsupportedPattern(self._pattern)
+            node = Node("rep", children=(node,), min=low, max=high)
+        return node
+
+    def _bounds(self) -> tuple[int, int | None] | None:
+        end = self._pattern.find("}", self._position)
+        if end < 0:
+            return None
+        body = self._pattern[self._position + 1:end]
+        low, sep, high = body.partition(",")
+        if not low.isdigit() or (high and not high.isdigit()):
+            return None
+        self._position = end + 1
+        if not sep:
+            return int(low), int(low)
+        return int(low), int(high) if high else None
+
+    def _atom(self) -> Node:
+        char = self._next()
+        if char == ".":
+            return Any
+        if char == "[":
+            return self._charset()
+        if char == "(":
+            if self._peek() == "?":
+                if self._pattern.startswith("?:", self._position):
+                    self._position += 2
+                else:
+                    raise UnsupportedPattern(self._pattern)
+            node = self._alternation(top=False)
+            if self._next() != ")":
+                raise UnsupportedPattern(self._pattern)
+            return node
+        if char == "\\":
+            return Node("lit", self._escape())
+        if char in _special:
+            raise UnsupportedPattern(self._pattern)
+        return Node("lit", char)
+
+    def _escape(self) -> str:
+        char = self._next()
+        if not char or char.isalnum() and char not in _escapes:
+            raise UnsupportedPattern(self._pattern)
+        return _escapes.get(char, char)
+
+    def _charset(self) -> Node:
+        negated = self._peek() == "^"
+        if negated:
+            self._next()
+        items = []
+        first = True
+        while True:
+            char = self._next()
+            if not char:
+                raise UnsupportedPattern(self._pattern)
+            if char == "]" and not first:
+                break
+            first = False
+            if char == "\\":
+                char = self._escape()
+            elif char == "[":
+                raise UnsupportedPattern(self._pattern)
+            if self._peek() == "-" and self._pattern[self._position + 1:self._position + 2] not in ("]", ""):
+                self._next()
+                high = self._next()
+                if high == "\\":
+                    high = self._escape()
+                items.append((char, high))
+            else:
+                items.append((char, char))
+        return Node("set", (negated, tuple(items)))
+
+
+def parse(pattern: str) -> Node:
+    return _Parser(pattern).parse()
+
+
+def literal_affix(node: Node, suffix: bool = False) -> tuple[str, bool]:
+    if node.kind == "empty":
+        return "", True
+    if node.kind == "lit":
+        return node.value.lower(), True
+    if node.kind == "set":
+        negated, items = node.value
+        if not negated and len(items) == 1 and items[0][0] == items[0][1]:
+            return items[0][0].lower(), True
+        return "", False
+    if node.kind == "cat":
+        out = ""
+        for child in reversed(node.children) if suffix else node.children:
+            text, exact = literal_affix(child, suffix)
+            out = text + out if suffix else out + text
+            if not exact:
+                return out, False
+        return out, True
+    if node.kind == "alt":
+        affixes = [literal_affix(child, suffix) for child in node.children]
+        texts = [text[::-1] if suffix else text for text, _ in affixes]
+        common = texts[0]
+        for text in texts[1:]:
+            while not text.startswith(common):
+                common = common[:-1]
+        exact = all(exact for _, exact in affixes) and len(set(texts)) == 1
+        return (common[::-1] if suffix else common), exact
+    if node.kind == "rep":
+        text, exact = literal_affix(node.children[0], suffix)
+        if node.min == node.max and exact:
+            return text * node.min, True
+        if node.min >= 1:
+            return text, False
+        return "", False
+    return "", False
+
+
+def ngrams(text: str) -> set[str]:
+    if len(text) == 2:
+        return {text}
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+def _conjunction(parts: list) -> tuple | None:
+    items = []
+    for part in parts:
+        if part is None:
+            continue
+        if part[0] == "and":
+            items.extend(part[1])
+        else:
+            items.append(part)
+    if not items:
+        return None
+    return items[0] if len(items) == 1 else ("and", tuple(dict.fromkeys(items)))
+
+
+def ngram_query(node: Node) -> tuple | None:
+    if node.kind == "cat":
+        parts = []
+        run = ""
+        for child in node.children:
+            text, exact = literal_affix(child)
+            if exact:
+                run += text
+                continue
+            parts.extend(("tri", gram) for gram in ngrams(run + text))
+            parts.append(ngram_query(child))
+            run = literal_affix(child, suffix=True)[0]
+        parts.extend(("tri", gram) for gram in ngrams(run))
+        return _conjunction(parts)
+    if node.kind == "alt":
+        branches = [ngram_query(child) for child in node.children]
+        if any(branch is None for branch in branches):
+            return None
+        return ("or", tuple(branches))
+    if node.kind == "rep" and node.min >= 1:
+        text, exact = literal_affix(node.children[0])
+        query = ngram_query(node.children[0])
+        if exact:
+            query = _conjunction([("tri", gram) for gram in ngrams(text * node.min)])
+        return query
+    return None
+
+
+def leading_wildcard(node: Node) -> bool:
+    if node.kind == "any":
+        return True
+    if node.kind == "set":
+        return node.value[0]
+    if node.kind == "cat":
+        for child in node.children:
+            if leading_wildcard(child):
+                return True
+            if not (child.kind == "rep" and child.min == 0) and child.kind != "empty":
+                return False
+        return False
+    if node.kind == "alt":
+        return any(leading_wildcard(child) for child in node.children)
+    if node.kind == "rep":
+        return leading_wildcard(node.children[0])
+    return False
+
+
+def min_length(node: Node) -> int:
+    if node.kind == "empty":
+        return 0
+    if node.kind in ("lit", "any", "set"):
+        return 1
+    if node.kind == "cat":
+        return sum(min_length(child) for child in node.children)
+    if node.kind == "alt":
+        return min(min_length(child) for child in node.children)
+    return node.min * min_length(node.children[0])
+
+
+def prefix_form(node: Node) -> tuple[str, int] | None:
+    children = list(node.children) if node.kind == "cat" else [node]
+    prefix = ""
+    while children:
+        text, exact = literal_affix(children[0])
+        if not exact:
+            break
+        prefix += text
+        children.pop(0)
+    unbounded = False
+    extra = 0
+    for child in children:
+        if child.kind == "any":
+            extra += 1
+        elif child.kind == "rep" and child.children[0].kind == "any" and child.max is None:
+            extra += child.min
+            unbounded = True
+        else:
+            return None
+    return (prefix, extra) if unbounded else None
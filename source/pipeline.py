@@ -0,0 +1,233 @@
+import json
+import os
+from collections import deque
+from contextlib import ExitStack
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator
+from . import pathmanager
+from .build import BuildLang, write_dictionary
+from .checkpoint import Checkpoint
+from .constants import EngUrl, ManifestDir, PlUrl, TmpDir
+from .convert import ConvertDump, ConvertEng, ConvertPl, page_key
+from .exception import WikitionaryReaderException
+from .logger import Log
+from .manifest import Manifest, decode_entries, encode_entry
+from .parallelrun import ParallelRun, ordered_map
+from .parse import ParseDump, ParseEng, ParsePl
+
+
+def convert_and_parse(
+    convert: ConvertDump, parse: ParseDump, keep_converted: bool, pages: list[bytes]
+) -> list[tuple[dict, list[dict]] | None]:
+    results = []
+    for page in pages:
+        record = convert.select_page(page)
+        if record is None:
+            results.append(None)
+        else:
+            results.append(((record if keep_converted else {}), parse.process([record])))
+    return results
+
+
+def group_changes(paths: Iterable[Path]) -> dict[str, list[Path]]:
+    wikis = {
+        pathmanager.get_filename(url).split("-", 1)[0]: key
+        for key, url in (("eng", EngUrl), ("pl", PlUrl))
+    }
+    changes: dict[str, list[Path]] = {}
+    for path in sorted(paths, key=lambda path: path.name):
+        key = wikis.get(path.name.split("-", 1)[0])
+        if key is None:
+            raise WikitionaryReaderException(
+                f"Cannot tell which wiki {path.name} belongs to (expected {' or '.join(wikis)})."
+            )
+        changes.setdefault(key, []).append(path)
+    return changes
+
+
+class StreamLang:
+    def __init__(
+        self,
+        convert: ConvertDump,
+        parse: ParseDump,
+        build: BuildLang,
+        name: str,
+        workers: int = 0,
+        keep_intermediate: bool = False,
+        manifest: Manifest | None = None,
+        changes: list[Path] | None = None,
+        resume: bool = False,
+    ):
+        self._convert = convert
+        self._parse = parse
+        self._build = build
+        self._name = name
+        self._workers = workers
+        self._keep_intermediate = keep_intermediate
+        self._manifest = manifest
+        self._changes = changes
+        self._resume = resume
+        self._log = Log(f"Stream {name.upper()}")
+
+    def _batches(
+        self, paths: list[Path | None], previous: dict, counter: list[int], keys: deque, skip: int
+    ) -> Iterator[list[bytes]]:
+        for path in paths:
+            for batch in self._convert.batches(counter, path, skip):
+                batch_keys = [page_key(page) for page in batch]
+                keys.append(batch_keys)
+                yield [
+                    page
+                    for page, (page_id, revision) in zip(batch, batch_keys)
+                    if previous.get(page_id, ("",))[0] != revision
+                ]
+
+    def _updates(
+        self, paths: list[Path | None], previous: dict, counter: list[int], skip: int = 0
+    ) -> Iterator[tuple[str, tuple[str, list[dict]] | None]]:
+        keys = deque()
+        results = ordered_map(
+            partial(convert_and_parse, self._convert, self._parse, self._keep_intermediate),
+            self._batches(paths, previous, counter, keys, skip),
+            self._workers,
+        )
+        with ExitStack() as stack:
+            files = []
+            if self._keep_intermediate:
+                files = [
+                    stack.enter_context(open(TmpDir / f"{self._name}.{stage}.json", "w", encoding="utf-8"))
+                    for stage in ("converted", "parsed")
+                ]
+            for processed in results:
+                processed = iter(processed)
+                for page_id, revision in keys.popleft():
+                    entry = previous.get(page_id)
+                    if entry is not None and entry[0] == revision:
+                        counter[2] += 1
+                    elif (result := next(processed)) is None:
+                        entry = None
+                    else:
+                        for out_file, records in zip(files, ([result[0]], result[1])):
+                            out_file.writelines(
+                                json.dumps(record, ensure_ascii=False) + "\n" for record in records
+                            )
+                        entry = (revision, result[1])
+                    if entry is not None:
+                        counter[1] += 1
+                    yield page_id, entry
+
+    def _journaled(self, previous: dict, counter: list[int]) -> dict:
+        journal_path = TmpDir / f"{self._name}.journal.json"
+        checkpoint = Checkpoint(journal_path.stem, self._resume)
+        pages = checkpoint.state.get("pages", 0) if journal_path.exists() else 0
+        entries = {}
+        if pages:
+            os.truncate(journal_path, checkpoint.state["bytes"])
+            with open(journal_path, "r", encoding="utf-8") as f:
+                entries = decode_entries(f)
+            counter[:2] = [pages, len(entries)]
+            if checkpoint.done:
+                self._log.info(f"Reusing {journal_path}")
+                return entries
+            self._log.info(f"Resuming after {pages} pages")
+
+        with open(journal_path, "a" if pages else "w", encoding="utf-8") as journal:
+            for page_id, entry in self._updates([None], previous, counter, pages):
+                pages += 1
+                if entry is not None:
+                    entries[page_id] = entry
+                    journal.write(encode_entry(page_id, entry))
+                if checkpoint.due(pages):
+                    journal.flush()
+                    checkpoint.save(pages=pages, bytes=journal.tell())
+            journal.flush()
+            checkpoint.complete(pages=pages, bytes=journal.tell())
+        return entries
+
+    def __call__(self) -> dict:
+        counter = [0, 0, 0]
+        previous = self._manifest.load() if self._manifest else None
+        if self._changes is None:
+            entries = self._journaled(previous or {}, counter)
+        elif previous is None:
+            raise WikitionaryReaderException(
+                f"No {self._name.upper()} manifest to apply changes to. Run a full 'make' first."
+            )
+        else:
+            entries = dict(previous)
+            for page_id, entry in self._updates(self._changes, previous, counter):
+                if entry is None:
+                    entries.pop(page_id, None)
+                else:
+                    entries[page_id] = entry
+        if self._manifest:
+            self._manifest.save(entries)
+
+        index = self._build.index(
+            record for _, records in entries.values() for record in records
+        )
+        if counter[2]:
+            self._log.info(f"Reused {counter[2]} unchanged pages")
+        self._log.complete_pages(counter[0], len(index))
+        return index
+
+
+class Stream(ParallelRun[dict]):
+    def __init__(
+        self,
+        context: dict[str, Path],
+        include_redirects: bool,
+        progress_every: int = 10000,
+        export_json: bool = True,
+        workers: int | None = None,
+        keep_intermediate: bool = False,
+        incremental: bool = True,
+        changes: dict[str, list[Path]] | None = None,
+        resume: bool = False,
+    ):
+        sources = context.get("fetch", {})
+        if changes is None and ("eng" not in sources or "pl" not in sources):
+            raise WikitionaryReaderException("Stream requires 'eng' and 'pl' sources.")
+
+        self._export_json = export_json
+        self._resume = resume
+        self._log = Log("Build dictionary")
+        manifests = {
+            key: Manifest(ManifestDir / f"{key}.jsonl", {"include_redirects": include_redirects})
+            for key in ("eng", "pl")
+        }
+        if not incremental:
+            for manifest in manifests.values():
+                manifest.remove()
+
+        if workers is None:
+            workers = (os.cpu_count() or 1) // 2
+        tasks = {
+            "eng": StreamLang(
+                ConvertEng(sources.get("eng"), include_redirects, progress_every),
+                ParseEng(TmpDir / "eng.converted.json", progress_every),
+                BuildLang(TmpDir / "eng.parsed.json", "Build ENG index", progress_every),
+                "eng",
+                workers,
+                keep_intermediate,
+                manifests["eng"],
+                None if changes is None else changes.get("eng", []),
+                resume,
+            ),
+            "pl": StreamLang(
+                ConvertPl(sources.get("pl"), include_redirects, progress_every),
+                ParsePl(TmpDir / "pl.converted.json", progress_every),
+                BuildLang(TmpDir / "pl.parsed.json", "Build PL index", progress_every),
+                "pl",
+                workers,
+                keep_intermediate,
+                manifests["pl"],
+                None if changes is None else changes.get("pl", []),
+                resume,
+            ),
+        }
+        super().__init__(tasks)
+
+    def __call__(self) -> Path:
+        return write_dictionary(super().__call__, self._export_json, self._resume, self._log)
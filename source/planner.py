@@ -0,0 +1,153 @@
+import json
+from bisect import bisect_left
+from typing import Any, Iterator, NamedTuple, Sequence
+from .filter import AndFilters, spec_key
+from .store import Store, load_numpy
+
+ChunkSize = 1024
+
+
+class Step(NamedTuple):
+    filter: Any
+    estimate: int
+    selectivity: float
+    cost: int
+
+    @property
+    def rank(self) -> float:
+        return self.cost / max(1.0 - self.selectivity, 0.01)
+
+
+def flatten(filters: Any) -> list[Any]:
+    if isinstance(filters, AndFilters):
+        return [item for f in filters for item in flatten(f)]
+    return [filters]
+
+
+class Plan:
+    def __init__(self, filters: Any, store: Store, vectorize: bool = True):
+        self._store = store
+        self._dropped: list[Any] = []
+        self._source: Step | None = None
+        self._rows: Sequence[int] | None = None
+        self._exact_source = False
+        self._vectorized: list[Step] = []
+        self._mask = None
+
+        steps = []
+        for f in flatten(filters):
+            if f.matches_all(store):
+                self._dropped.append(f)
+                continue
+            step = Step(f, f.estimate(store), f.selectivity(store), f.cost)
+            mask = f.mask(store) if vectorize else None
+            if mask is None:
+                steps.append(step)
+                continue
+            self._vectorized.append(step)
+            self._mask = mask if self._mask is None else self._mask & mask
+
+        for step in sorted(steps, key=lambda step: step.estimate):
+            if step.estimate >= len(store):
+                break
+            rows = step.filter.candidates(store)
+            if rows is not None:
+                self._source = step
+                self._rows = rows
+                if step.filter.exact:
+                    self._exact_source = True
+                    steps.remove(step)
+                break
+
+        if self._mask is not None:
+            if self._rows is None:
+                self._rows = load_numpy().flatnonzero(self._mask).tolist()
+            else:
+                self._rows = self._masked(self._rows)
+        self._steps = sorted(steps, key=lambda step: step.rank)
+
+    @property
+    def filters(self) -> list[Any]:
+        return [step.filter for step in self._steps]
+
+    @property
+    def scanned(self) -> int:
+        return len(self._rows) if self._rows is not None else len(self._store)
+
+    @property
+    def spec(self) -> dict | None:
+        steps = self._vectorized + self._steps
+        if self._source is not None and self._source not in steps:
+            steps.append(self._source)
+        specs = [step.filter.spec() for step in steps]
+        if any(spec is None for spec in specs):
+            return None
+        return {"and": specs}
+
+    @property
+    def key(self) -> tuple | None:
+        spec = self.spec
+        return None if spec is None else spec_key(spec)
+
+    def _masked(self, rows: Sequence[int]) -> list[int]:
+        numpy = load_numpy()
+        rows = numpy.asarray(rows, dtype=numpy.intp)
+        return rows[self._mask[rows]].tolist()
+
+    def _filter(self, rows: Sequence[int]) -> list[int]:
+        rows = list(rows)
+        for step in self._steps:
+            if not rows:
+                break
+            rows = step.filter.select(self._store, rows)
+        return rows
+
+    def execute(self) -> list[int]:
+        rows = self._rows if self._rows is not None else range(len(self._store))
+        return self._filter(rows)
+
+    def shard(self, start: int, stop: int) -> list[int]:
+        if self._rows is None:
+            return self._filter(range(start, stop))
+        low = bisect_left(self._rows, start)
+        high = bisect_left(self._rows, stop, lo=low)
+        return self._filter(self._rows[low:high])
+
+    def refine(self, rows: Sequence[int]) -> list[int]:
+        if self._exact_source:
+            rows = self._source.filter.select(self._store, rows)
+        if self._mask is not None:
+            rows = self._masked(rows)
+        return self._filter(rows)
+
+    def rows(self) -> Iterator[int]:
+        source = self._rows if self._rows is not None else range(len(self._store))
+        start, size = 0, ChunkSize
+        while start < len(source):
+            yield from self._filter(source[start:start + size])
+            start += size
+            size *= 2
+
+    def explain(self) -> str:
+        total = len(self._store)
+        lines = []
+        if self._source is None and self._mask is None:
+            lines.append(f"scan: all rows ({total})")
+        elif self._source is not None:
+            lines.append(
+                f"index: {self._source.filter!r} -> {self._source.estimate} of {total} rows"
+            )
+        for step in self._vectorized:
+            lines.append(f"vectorized: {step.filter!r} cost={step.cost}")
+        if self._mask is not None:
+            lines.append(f"mask: {len(self._rows)} of {total} rows")
+        for step in self._steps:
+            lines.append(
+                f"filter: {step.filter!r} cost={step.cost} "
+                f"selectivity={step.selectivity:.3f}"
+            )
+        for f in self._dropped:
+            lines.append(f"dropped: {f!r} matches all rows")
+        if self.spec is not None:
+            lines.append(f"spec: {json.dumps(self.spec)}")
+        return "\n".join(lines)
@@ -0,0 +1,155 @@
+import json
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from .constants import ServerHost, ServerPort
+from .dictionary import Dictionary
+from .exception import WikitionaryReaderException
+from .logger import Log
+
+
+class Batcher:
+    def __init__(self, dictionary: Dictionary):
+        self._dictionary = dictionary
+        self._lock = threading.Lock()
+        self._pending: dict[str, Future] = {}
+
+    def _validate(self, query: dict) -> dict:
+        if not isinstance(query, dict):
+            raise WikitionaryReaderException(f"Query must be a JSON object: {query!r}")
+        for name in ("limit", "offset"):
+            value = query.get(name)
+            if value is not None and (type(value) is not int or value < 0):
+                raise WikitionaryReaderException(f"Invalid {name}: {value!r}")
+        spec = query.get("spec")
+        if not isinstance(spec, dict):
+            raise WikitionaryReaderException("Query needs a filter spec.")
+        return spec
+
+    def _answer(self, query: dict) -> dict:
+        spec = self._validate(query)
+        if query.get("explain"):
+            return {"plan": self._dictionary.explain(spec)}
+        if query.get("count"):
+            return {"found": self._dictionary.count(spec)}
+        words = [
+            record["word"]
+            for record in self._dictionary.search(
+                spec, limit=query.get("limit"), offset=query.get("offset", 0)
+            )
+        ]
+        return {"found": len(words), "words": words}
+
+    def many(self, queries: list) -> list[dict]:
+        answers: list[dict | None] = [None] * len(queries)
+        groups: dict[tuple, list[int]] = {}
+        for position, query in enumerate(queries):
+            self._validate(query)
+            if query.get("explain"):
+                answers[position] = self(query)
+            elif query.get("count"):
+                groups.setdefault((True, None, 0), []).append(position)
+            else:
+                groups.setdefault(
+                    (False, query.get("limit"), query.get("offset") or 0), []
+                ).append(position)
+
+        for (count, limit, offset), positions in groups.items():
+            results = self._dictionary.search_many(
+                [queries[position]["spec"] for position in positions],
+                limit=limit,
+                offset=offset,
+                count=count,
+            )
+            for index, position in enumerate(positions):
+                if count:
+                    answers[position] = {"found": results[index]}
+                else:
+                    words = [record["word"] for record in results[index]]
+                    answers[position] = {"found": len(words), "words": words}
+        return answers
+
+    def __call__(self, query: dict) -> dict:
+        token = json.dumps(query, sort_keys=True)
+        with self._lock:
+            future = self._pending.get(token)
+            owner = future is None
+            if owner:
+                future = self._pending[token] = Future()
+        if not owner:
+            return future.result()
+        try:
+            result = self._answer(query)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[token]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "SearchServer"
+
+    def _reply(self, status: int, body: Any):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, self.server.dictionary.stats)
+        else:
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/search":
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if isinstance(body, list):
+                self._reply(200, self.server.batcher.many(body))
+            else:
+                self._reply(200, self.server.batcher(body))
+        except (WikitionaryReaderException, ValueError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+        except Exception as e:
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format: str, *args):
+        pass
+
+
+class SearchServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, dictionary: Dictionary, host: str = ServerHost, port: int = ServerPort):
+        self.dictionary = dictionary
+        self.batcher = Batcher(dictionary)
+        super().__init__((host, port), _Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __call__(self):
+        log = Log("Server")
+        stats = self.dictionary.load()
+        log.info(f"Serving {stats['entries']} words at {self.url}")
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            log.info("Server stopped")
+        finally:
+            self.server_close()
+            self.dictionary.close()
@@ -0,0 +1,72 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from .filter import compile_filters, spec_key
+from .planner import Plan
+from .store import Store
+
+PlanCache = 8
+
+_worker: dict = {}
+
+
+def _open(path: str, stamp: tuple) -> Store:
+    if _worker.get("stamp") != stamp:
+        _worker["store"] = Store.open(Path(path))
+        _worker["stamp"] = stamp
+        _worker["plans"] = OrderedDict()
+    return _worker["store"]
+
+
+def _plan(store: Store, spec: dict) -> Plan:
+    plans = _worker["plans"]
+    key = spec_key(spec)
+    plan = plans.get(key)
+    if plan is None:
+        plan = plans[key] = Plan(compile_filters(spec), store)
+        if len(plans) > PlanCache:
+            plans.popitem(last=False)
+    else:
+        plans.move_to_end(key)
+    return plan
+
+
+def _search_shard(path: str, stamp: tuple, spec: dict, start: int, stop: int) -> list[int]:
+    store = _open(path, stamp)
+    return _plan(store, spec).shard(start, stop)
+
+
+class ShardedSearch:
+    def __init__(self, workers: int | None = None, shards_per_worker: int = 4):
+        self._workers = workers or os.cpu_count() or 1
+        self._shards = self._workers * shards_per_worker
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self._workers)
+            return self._executor
+
+    def search(self, path: Path, stamp: tuple, spec: dict, count: int) -> list[int]:
+        executor = self._pool()
+        size = max(1, -(-count // self._shards))
+        futures = [
+            executor.submit(
+                _search_shard, str(path), stamp, spec, start, min(start + size, count)
+            )
+            for start in range(0, count, size)
+        ]
+        rows: list[int] = []
+        for future in futures:
+            rows.extend(future.result())
+        return rows
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
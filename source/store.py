@@ -0,0 +1,256 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+from .exception import WikitionaryReaderException
+from .index import Postings, SortedKeys
+from .record import Record
+from .trie import Dawg
+
+PosTypes = ("rzeczownik", "czasownik", "przymiotnik", "zaimek")
+
+Magic = b"PLDICT\x00\x00"
+Version = 1
+Header = struct.Struct("<8sHHI")
+Section = struct.Struct("<16scxxxxxxxQQ")
+Columns = ("offsets", "letters", "syllables", "pos")
+Indexes = ("letters", "syllables", "pos", "ngrams")
+Orders = ("prefix", "suffix")
+DawgColumns = ("first", "labels", "targets", "offsets", "final", "count")
+MapFiles = os.name != "nt"
+
+
+@lru_cache(maxsize=None)
+def load_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def pos_mask(pos: list[str] | str) -> int:
+    if isinstance(pos, str):
+        pos = [pos]
+    mask = 0
+    for bit, name in enumerate(PosTypes):
+        if name in pos:
+            mask |= 1 << bit
+    return mask
+
+
+def pos_names(mask: int) -> list[str]:
+    return [name for bit, name in enumerate(PosTypes) if mask & (1 << bit)]
+
+
+class Store:
+    def __init__(self, words, offsets, letters, syllables, pos, indexes=None):
+        self.words = words
+        self.offsets = offsets
+        self.letters = letters
+        self.syllables = syllables
+        self.pos = pos
+        self._indexes: dict[str, Postings] = dict(indexes or {})
+        self._orders: dict[str, SortedKeys] = {}
+        self._dawg: Dawg | None = None
+        self._vectors: dict = {}
+        self._buffer = None
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[dict]) -> "Store":
+        words = bytearray()
+        offsets = array("I", [0])
+        letters = array("H")
+        syllables = array("B")
+        pos = array("B")
+        for entry in entries:
+            word = entry["word"]
+            words += word.encode("utf-8")
+            offsets.append(len(words))
+            letters.append(min(len(word), 0xFFFF))
+            syllables.append(min(max(int(entry.get("syllables", 0)), 0), 0xFF))
+            pos.append(pos_mask(entry.get("pos", [])))
+        return cls(bytes(words), offsets, letters, syllables, pos)
+
+    def __len__(self) -> int:
+        return len(self.letters)
+
+    @property
+    def nbytes(self) -> int:
+        columns = [self.offsets, self.letters, self.syllables, self.pos]
+        for postings in self._indexes.values():
+            columns += [postings.keys, postings.starts, postings.rows]
+        columns += [order.rows for order in self._orders.values()]
+        if self._dawg is not None:
+            columns += [getattr(self._dawg, name) for name in DawgColumns]
+        return len(self.words) + sum(
+            column.itemsize * len(column) for column in columns
+        )
+
+    def word(self, row: int) -> str:
+        return str(self.words[self.offsets[row]:self.offsets[row + 1]], "utf-8")
+
+    def index(self, name: str) -> Postings:
+        if name not in self._indexes:
+            if name == "pos":
+                self._indexes[name] = Postings.from_masks(self.pos)
+            elif name == "ngrams":
+                self._indexes[name] = Postings.from_ngrams(
+                    self.key(row) for row in range(len(self))
+                )
+            elif name in Indexes:
+                self._indexes[name] = Postings.from_values(getattr(self, name))
+            else:
+                raise WikitionaryReaderException(f"Unknown index: {name}")
+        return self._indexes[name]
+
+    def key(self, row: int) -> str:
+        return self.word(row).lower()
+
+    def reversed_key(self, row: int) -> str:
+        return self.word(row).lower()[::-1]
+
+    def order(self, name: str) -> SortedKeys:
+        if name not in self._orders:
+            if name == "prefix":
+                self._orders[name] = SortedKeys.from_key(len(self), self.key)
+            elif name == "suffix":
+                self._orders[name] = SortedKeys.from_key(len(self), self.reversed_key)
+            else:
+                raise WikitionaryReaderException(f"Unknown order: {name}")
+        return self._orders[name]
+
+    def vector(self, name: str):
+        numpy = load_numpy()
+        if numpy is None:
+            return None
+        if name not in self._vectors:
+            column = getattr(self, name)
+            typecode = getattr(column, "typecode", None) or column.format
+            self._vectors[name] = numpy.frombuffer(column, dtype=numpy.dtype(typecode))
+        return self._vectors[name]
+
+    def dawg(self) -> Dawg:
+        if self._dawg is None:
+            rows = self.order("prefix").rows
+            self._dawg = Dawg.from_keys(self.key(row) for row in rows)
+        return self._dawg
+
+    def record(self, row: int) -> Record:
+        return Record(
+            word=self.word(row),
+            pos=pos_names(self.pos[row]),
+            syllables=self.syllables[row],
+        )
+
+    def save(self, path: Path):
+        sections = {name: getattr(self, name) for name in Columns}
+        sections["words"] = array("B", self.words)
+        for name in Indexes:
+            postings = self.index(name)
+            sections[f"{name}.keys"] = postings.keys
+            sections[f"{name}.starts"] = postings.starts
+            sections[f"{name}.rows"] = postings.rows
+        for name in Orders:
+            sections[f"{name}.rows"] = self.order(name).rows
+        for name in DawgColumns:
+            sections[f"dawg.{name}"] = getattr(self.dawg(), name)
+
+        table_end = Header.size + Section.size * len(sections)
+        layout = []
+        position = table_end
+        for name, column in sections.items():
+            position += -position % 8
+            layout.append((name, column, position))
+            position += column.itemsize * len(column)
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(Header.pack(Magic, Version, len(sections), len(self)))
+            for name, column, offset in layout:
+                f.write(
+                    Section.pack(
+                        name.encode("ascii"),
+                        column.typecode.encode("ascii"),
+                        offset,
+                        column.itemsize * len(column),
+                    )
+                )
+            for _, column, offset in layout:
+                f.write(b"\x00" * (offset - f.tell()))
+                if sys.byteorder != "little":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                f.write(column.tobytes())
+        try:
+            os.replace(tmp_path, path)
+        except PermissionError as e:
+            raise WikitionaryReaderException(
+                f"Cannot replace {path}: another process (a running 'serve' or Streamlit app?) "
+                f"holds it open. Stop it and rerun 'make --resume'."
+            ) from e
+
+    @classmethod
+    def open(cls, path: Path) -> "Store":
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < Header.size:
+                raise WikitionaryReaderException(f"Invalid dictionary file: {path}")
+            if MapFiles:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
+
+        magic, version, count, rows = Header.unpack_from(buffer, 0)
+        if magic != Magic or version != Version:
+            if MapFiles:
+                buffer.close()
+            raise WikitionaryReaderException(
+                f"Unsupported dictionary file format: {path}"
+            )
+
+        view = memoryview(buffer)
+        sections = {}
+        for index in range(count):
+            name, typecode, offset, size = Section.unpack_from(
+                buffer, Header.size + index * Section.size
+            )
+            name = name.rstrip(b"\x00").decode("ascii")
+            typecode = typecode.decode("ascii")
+            data = view[offset:offset + size]
+            if typecode == "B":
+                sections[name] = data
+            elif sys.byteorder == "little":
+                sections[name] = data.cast(typecode)
+            else:
+                column = array(typecode, data.tobytes())
+                column.byteswap()
+                sections[name] = column
+
+        missing = [name for name in (*Columns, "words") if name not in sections]
+        if missing or len(sections["letters"]) != rows:
+            raise WikitionaryReaderException(f"Corrupted dictionary file: {path}")
+
+        indexes = {
+            name: Postings(
+                sections[f"{name}.keys"],
+                sections[f"{name}.starts"],
+                sections[f"{name}.rows"],
+            )
+            for name in Indexes
+            if f"{name}.keys" in sections
+        }
+        store = cls(
+            sections["words"], *(sections[name] for name in Columns), indexes=indexes
+        )
+        keys = {"prefix": store.key, "suffix": store.reversed_key}
+        for name in Orders:
+            if f"{name}.rows" in sections:
+                store._orders[name] = SortedKeys(sections[f"{name}.rows"], keys[name])
+        if all(f"dawg.{name}" in sections for name in DawgColumns):
+            store._dawg = Dawg(*(sections[f"dawg.{name}"] for name in DawgColumns))
+        store._buffer = buffer
+        return store
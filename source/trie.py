@@ -0,0 +1,218 @@
+from array import array
+from typing import Iterable, Iterator
+from .automaton import Automaton
+
+
+class _Node:
+    __slots__ = ("final", "edges", "id")
+
+    def __init__(self):
+        self.final = False
+        self.edges: dict[str, "_Node"] = {}
+        self.id = -1
+
+
+class Dawg:
+    def __init__(self, first, labels, targets, offsets, final, count):
+        self.first = first
+        self.labels = labels
+        self.targets = targets
+        self.offsets = offsets
+        self.final = final
+        self.count = count
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str]) -> "Dawg":
+        root = _Node()
+        register: dict[tuple, _Node] = {}
+        unchecked: list[tuple[_Node, str, _Node]] = []
+
+        def minimize(down_to: int):
+            while len(unchecked) > down_to:
+                parent, char, child = unchecked.pop()
+                signature = (
+                    child.final,
+                    tuple((label, node.id) for label, node in child.edges.items()),
+                )
+                existing = register.get(signature)
+                if existing is None:
+                    child.id = len(register)
+                    register[signature] = child
+                else:
+                    parent.edges[char] = existing
+
+        previous = ""
+        for key in keys:
+            if key <= previous and previous:
+                continue
+            common = 0
+            limit = min(len(key), len(previous))
+            while common < limit and key[common] == previous[common]:
+                common += 1
+            minimize(common)
+            node = unchecked[-1][2] if unchecked else root
+            for char in key[common:]:
+                child = _Node()
+                node.edges[char] = child
+                unchecked.append((node, char, child))
+                node = child
+            node.final = True
+            previous = key
+        minimize(0)
+        return cls._flatten(root)
+
+    @classmethod
+    def _flatten(cls, root: _Node) -> "Dawg":
+        index = {id(root): 0}
+        order = [root]
+        for node in order:
+            for child in node.edges.values():
+                if id(child) not in index:
+                    index[id(child)] = len(order)
+                    order.append(child)
+
+        count = array("I", [0] * len(order))
+        totals: dict[int, int] = {}
+
+        def total(node: _Node) -> int:
+            key = id(node)
+            if key not in totals:
+                totals[key] = int(node.final) + sum(total(child) for child in node.edges.values())
+            return totals[key]
+
+        first = array("I", [0])
+        labels = array("I")
+        targets = array("I")
+        offsets = array("I")
+        final = array("B")
+        for position, node in enumerate(order):
+            count[position] = total(node)
+            final.append(int(node.final))
+            offset = int(node.final)
+            for label in sorted(node.edges):
+                child = node.edges[label]
+                labels.append(ord(label))
+                targets.append(index[id(child)])
+                offsets.append(offset)
+                offset += total(child)
+            first.append(len(labels))
+        return cls(first, labels, targets, offsets, final, count)
+
+    def __len__(self) -> int:
+        return self.count[0] if len(self.count) else 0
+
+    def _find(self, node: int, char: str) -> int:
+        label = ord(char)
+        low, high = self.first[node], self.first[node + 1]
+        while low < high:
+            middle = (low + high) // 2
+            if self.labels[middle] < label:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.first[node + 1] and self.labels[low] == label:
+            return low
+        return -1
+
+    def _walk(self, prefix: str) -> tuple[int, int] | None:
+        node, rank = 0, 0
+        if not len(self.final):
+            return None
+        for char in prefix:
+            edge = self._find(node, char)
+            if edge < 0:
+                return None
+            rank += self.offsets[edge]
+            node = self.targets[edge]
+        return node, rank
+
+    def rank(self, key: str) -> int | None:
+        found = self._walk(key)
+        if found is None or not self.final[found[0]]:
+            return None
+        return found[1]
+
+    def __contains__(self, key: str) -> bool:
+        return self.rank(key) is not None
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        found = self._walk(prefix)
+        if found is None:
+            return 0, 0
+        node, rank = found
+        return rank, rank + self.count[node]
+
+    def completions(self, prefix: str = "") -> Iterator[tuple[str, int]]:
+        found = self._walk(prefix)
+        if found is None:
+            return
+        stack = [(found[0], prefix, found[1])]
+        while stack:
+            node, key, rank = stack.pop()
+            if self.final[node]:
+                yield key, rank
+            for edge in range(self.first[node + 1] - 1, self.first[node] - 1, -1):
+                stack.append(
+                    (self.targets[edge], key + chr(self.labels[edge]), rank + self.offsets[edge])
+                )
+
+    def intersect(self, automaton: Automaton) -> list[int]:
+        matched: list[int] = []
+        empty: set[tuple[int, int]] = set()
+        first, labels, targets = self.first, self.labels, self.targets
+        offsets, final = self.offsets, self.final
+        chars = {}
+
+        def walk(node: int, state: int, rank: int):
+            if (node, state) in empty:
+                return
+            before = len(matched)
+            if final[node] and automaton.accepts(state):
+                matched.append(rank)
+            for edge in range(first[node], first[node + 1]):
+                label = labels[edge]
+                char = chars.get(label)
+                if char is None:
+                    char = chars[label] = chr(label)
+                target_state = automaton.step(state, char)
+                if target_state != automaton.dead:
+                    walk(targets[edge], target_state, rank + offsets[edge])
+            if len(matched) == before:
+                empty.add((node, state))
+
+        if len(final):
+            walk(0, automaton.start, 0)
+        return matched
+
+    def intersect_many(self, automata: list[Automaton]) -> list[list[int]]:
+        matched: list[list[int]] = [[] for _ in automata]
+        empty: set[tuple[int, tuple]] = set()
+        first, labels, targets = self.first, self.labels, self.targets
+        offsets, final = self.offsets, self.final
+
+        def walk(node: int, states: tuple, rank: int) -> bool:
+            if (node, states) in empty:
+                return False
+            found = False
+            if final[node]:
+                for query, state in states:
+                    if automata[query].accepts(state):
+                        matched[query].append(rank)
+                        found = True
+            for edge in range(first[node], first[node + 1]):
+                char = chr(labels[edge])
+                live = []
+                for query, state in states:
+                    automaton = automata[query]
+                    target_state = automaton.step(state, char)
+                    if target_state != automaton.dead:
+                        live.append((query, target_state))
+                if live and walk(targets[edge], tuple(live), rank + offsets[edge]):
+                    found = True
+            if not found:
+                empty.add((node, states))
+            return found
+
+        if len(final) and automata:
+            walk(0, tuple((query, a.start) for query, a in enumerate(automata)), 0)
+        return matched